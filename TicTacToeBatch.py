@@ -0,0 +1,147 @@
+"""
+Simulate many games of tic-tac-toe at once with NumPy.
+
+Every game in a batch is a pair of 9-bit masks, one per side, so a whole batch
+advances one ply per step with a handful of array operations. Moves come from
+lookup tables indexed by those masks, built once at import.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from TicTacToeText import full_board, line_masks, squares
+
+NUM_MASKS = full_board + 1
+# whether a mask holds a full line
+HAS_LINE = np.array([any(mask & line == line for line in line_masks) for mask in range(NUM_MASKS)])
+# how many squares are in each mask, and those squares padded out to 9 columns
+SQUARE_COUNTS = np.array([len(squares[mask]) for mask in range(NUM_MASKS)], dtype=np.int64)
+SQUARE_TABLE = np.array([squares[mask] + (0,) * (9 - len(squares[mask])) for mask in range(NUM_MASKS)],
+                        dtype=np.int64)
+
+
+def threat_table() -> np.ndarray:
+    """Return check_if_losing(available, moves) as table[moves, available] for every pair of masks, -1 for None."""
+    moves = np.arange(NUM_MASKS)[:, None]
+    available = np.arange(NUM_MASKS)[None, :]
+    table = np.full((NUM_MASKS, NUM_MASKS), -1, dtype=np.int64)
+    # check_if_losing returns the first matching line, so let earlier lines overwrite later ones
+    for line in reversed(line_masks):
+        gap = line & ~moves
+        square = np.log2(np.maximum(gap, 1)).astype(np.int64)
+        completes = (gap & (gap - 1) == 0) & (gap & available != 0)
+        table = np.where(completes, square, table)
+    return table
+
+
+THREATS = threat_table()
+
+POLICIES = ('Random', 'RandomNotStupid')
+
+
+def policy_name(player) -> str:
+    """Return the batch policy for a Player class or its name, raising ValueError if there isn't one."""
+    name = player if isinstance(player, str) else player.__name__
+    if name not in POLICIES:
+        raise ValueError(f"No batch policy for {name}, options are {', '.join(POLICIES)}")
+    return name
+
+
+def random_moves(available: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Pick a uniformly random available square for each game."""
+    index = (rng.random(len(available)) * SQUARE_COUNTS[available]).astype(np.int64)
+    return SQUARE_TABLE[available, index]
+
+
+def random_not_stupid_moves(mine: np.ndarray, theirs: np.ndarray, available: np.ndarray,
+                            rng: np.random.Generator) -> np.ndarray:
+    """Take a winning square, else block, else pick randomly, for each game."""
+    moves = THREATS[mine, available]
+    block = THREATS[theirs, available]
+    moves = np.where(moves >= 0, moves, block)
+    return np.where(moves >= 0, moves, random_moves(available, rng))
+
+
+def play_batch(policy1: str, policy2: str, n: int, player1_first: bool,
+               rng: np.random.Generator) -> tuple[int, int, int]:
+    """
+    Play n games in lockstep.
+
+    :returns: (ties, player1 wins, player2 wins)
+    """
+    masks = np.zeros((2, n), dtype=np.int64)
+    winner = np.full(n, -1, dtype=np.int64)
+    active = np.arange(n)
+    # index 0 is whoever moves first
+    policies = (policy1, policy2) if player1_first else (policy2, policy1)
+    for ply in range(9):
+        side = ply & 1
+        mine = masks[side, active]
+        theirs = masks[side ^ 1, active]
+        available = full_board ^ (mine | theirs)
+        if policies[side] == 'Random':
+            moves = random_moves(available, rng)
+        else:
+            moves = random_not_stupid_moves(mine, theirs, available, rng)
+        mine |= 1 << moves
+        masks[side, active] = mine
+        won = HAS_LINE[mine]
+        winner[active[won]] = side
+        active = active[~won]
+    first_wins = int(np.count_nonzero(winner == 0))
+    second_wins = int(np.count_nonzero(winner == 1))
+    ties = n - first_wins - second_wins
+    if player1_first:
+        return ties, first_wins, second_wins
+    return ties, second_wins, first_wins
+
+
+def simulate(player1, player2, n: int, player1_first: bool = True, seed: int | None = None,
+             batch_size: int = 1 << 20) -> tuple[int, int, int]:
+    """
+    Play n games between two Random/RandomNotStupid players.
+
+    :param player1: the class (or class name) of player 1
+    :param player2: the class (or class name) of player 2
+    :param n: number of games
+    :param player1_first: whether player 1 moves first in every game
+    :param seed: seed for the random generator
+    :param batch_size: the most games to hold in memory at once
+    :returns: (ties, player1 wins, player2 wins)
+    """
+    policy1 = policy_name(player1)
+    policy2 = policy_name(player2)
+    rng = np.random.default_rng(seed)
+    ties = player1_wins = player2_wins = 0
+    while n > 0:
+        size = min(n, batch_size)
+        batch = play_batch(policy1, policy2, size, player1_first, rng)
+        ties += batch[0]
+        player1_wins += batch[1]
+        player2_wins += batch[2]
+        n -= size
+    return ties, player1_wins, player2_wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('player1', choices=POLICIES)
+    parser.add_argument('player2', choices=POLICIES)
+    parser.add_argument('-n', '--games', type=int, default=1000001)
+    parser.add_argument('--second', action='store_true', help='player 1 goes second')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ties, player1_wins, player2_wins = simulate(args.player1, args.player2, args.games,
+                                                not args.second, args.seed)
+    elapsed = time.perf_counter() - start
+    print("ties: " + str(ties))
+    print("Player1 wins: " + str(player1_wins))
+    print("Player2 wins: " + str(player2_wins))
+    print(f"{args.games} games in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
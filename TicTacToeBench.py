@@ -0,0 +1,206 @@
+"""
+Benchmarks for the players' moves, the win checks and whole games, compared
+with a stored baseline.
+
+    python TicTacToeBench.py                       compare with bench_baseline.json
+    python TicTacToeBench.py --save                make this run the new baseline
+    python TicTacToeBench.py --output results.json --threshold 0.25 move
+
+Every result is in nanoseconds per call (or per game), lower is better, and the
+run exits non-zero if anything is more than the threshold slower than the
+baseline, scaled by a reference benchmark to allow for the machine being faster
+or slower than the one the baseline was made on. Optional arguments pick
+benchmarks by name.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from TicTacToeText import Board, Impossible, Random, RandomNotStupid, check_if_losing, play_games
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+# positions to time the players' moves in, as the moves that led to them
+POSITIONS = {
+    'empty': [],
+    'corner_reply': [0],
+    'edge_reply': [1],
+    'middle_game': [0, 4, 8],
+    'block': [0, 4, 1],
+    'win': [0, 4, 1, 3],
+    'late': [0, 4, 8, 2, 6, 3, 5],
+}
+PAIRINGS = [(Random, Random), (Random, RandomNotStupid), (Random, Impossible),
+            (RandomNotStupid, RandomNotStupid), (RandomNotStupid, Impossible), (Impossible, Impossible)]
+
+
+def calibrate(function, min_time: float = 0.01) -> int:
+    """Return how many calls of function take at least min_time."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        if time.perf_counter() - start >= min_time:
+            return calls
+        calls *= 2
+
+
+def time_calls(function, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return time.perf_counter() - start
+
+
+def position(moves: list[int], player_type) -> tuple:
+    """Set up a board and a player to move on it, as if it had played the game so far."""
+    board = Board()
+    player = player_type('X', player_type.__name__)
+    player.has_first_turn = len(moves) % 2 == 0
+    for i, move in enumerate(moves):
+        #Impossible works out its plan on its first move as the second player
+        if i == 1 and not player.has_first_turn:
+            player.move(board)
+        board.place(move)
+    return board, player
+
+
+def move_benchmarks() -> dict:
+    benchmarks = {}
+    for player_type in (Random, RandomNotStupid, Impossible):
+        for name, moves in POSITIONS.items():
+            board, player = position(moves, player_type)
+            benchmarks[f"move/{player_type.__name__}/{name}"] = lambda player=player, board=board: player.move(board)
+    return benchmarks
+
+
+def check_benchmarks() -> dict:
+    board = Board()
+    for move in [0, 4, 1, 3, 8]:
+        board.place(move)
+    mine = board.masks[1]
+    #the first player has just completed the top row
+    won = Board()
+    for move in [0, 4, 1, 3, 2]:
+        won.place(move)
+    return {
+        'check/winning_move/no': lambda: board.check_winning_move(3),
+        'check/winning_move/yes': lambda: won.check_winning_move(2),
+        'check/if_losing/found': lambda: check_if_losing(board.available, mine),
+        #a lone stone in the middle is never one move from a line
+        'check/if_losing/none': lambda: check_if_losing(board.available, 1 << 4),
+    }
+
+
+def game_benchmarks() -> dict:
+    benchmarks = {}
+    for player1_type, player2_type in PAIRINGS:
+        benchmarks[f"game/{player1_type.__name__}-{player2_type.__name__}"] = \
+            lambda player1_type=player1_type, player2_type=player2_type: play_games(player1_type, player2_type,
+                                                                                    True, 1)
+    return benchmarks
+
+
+def reference():
+    """Plain Python work that no change to the game can speed up or slow down, to scale the baseline by."""
+    total = 0
+    for i in range(100):
+        total += i * i
+    return total
+
+
+def selected(name: str, names: list[str]) -> bool:
+    """
+    Whether any of names is a run of whole '/'-separated parts of the benchmark
+    name, so 'game' picks game/* but not move/*/middle_game.
+    """
+    parts = name.split('/')
+    for wanted in names:
+        wanted_parts = wanted.split('/')
+        for start in range(len(parts) - len(wanted_parts) + 1):
+            if parts[start:start + len(wanted_parts)] == wanted_parts:
+                return True
+    return False
+
+
+def run(names: list[str] | None = None, rounds: int = 20) -> dict[str, int]:
+    """
+    Run the benchmarks named by any of names (see selected), or all of them, and
+    return the best ns per call for each. Every round times every benchmark
+    once, so a slow patch on the machine doesn't land on just one of them.
+    """
+    benchmarks = {name: function for name, function in
+                  {**move_benchmarks(), **check_benchmarks(), **game_benchmarks()}.items()
+                  if not names or selected(name, names)}
+    benchmarks['reference'] = reference
+    calls = {name: calibrate(function) for name, function in benchmarks.items()}
+    best = dict.fromkeys(benchmarks, float('inf'))
+    for _ in range(rounds):
+        for name, function in benchmarks.items():
+            best[name] = min(best[name], time_calls(function, calls[name]))
+    results = {}
+    for name in benchmarks:
+        results[name] = round(best[name] / calls[name] * 1e9)
+        print(f"{name}: {results[name]:,}ns")
+    return results
+
+
+def compare(results: dict[str, int], baseline: dict[str, int], threshold: float) -> list[str]:
+    """
+    Return the benchmarks more than threshold (0.5 for 50%) slower than the
+    baseline, described. The baseline is scaled by how much faster or slower the
+    reference benchmark ran, so a slower machine isn't a regression.
+    """
+    scale = results['reference'] / baseline['reference'] if 'reference' in baseline else 1.0
+    regressions = []
+    for name, ns in results.items():
+        if name == 'reference' or name not in baseline:
+            continue
+        expected = baseline[name] * scale
+        if ns > expected * (1 + threshold):
+            regressions.append(f"{name}: {ns:,}ns, baseline {expected:,.0f}ns scaled from {baseline[name]:,}ns "
+                               f"({ns / expected - 1:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time moves, win checks and games, and compare them with a "
+                                                 "baseline.")
+    parser.add_argument('names', nargs='*',
+                        help="only run benchmarks with any of these as whole '/' parts of their name")
+    parser.add_argument('--baseline', default=BASELINE, help='the baseline file')
+    parser.add_argument('--save', action='store_true', help='write the results to the baseline file')
+    parser.add_argument('--output', help='also write the results to this file')
+    parser.add_argument('--threshold', type=float, default=0.5, help='how much slower counts as a regression')
+    args = parser.parse_args()
+
+    results = run(args.names)
+    document = {'python': platform.python_version(), 'machine': platform.machine(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(document, file, indent=2)
+    if args.save:
+        if args.names and os.path.exists(args.baseline):
+            #keep the benchmarks that weren't run this time
+            with open(args.baseline) as file:
+                document['results'] = {**json.load(file)['results'], **results}
+        with open(args.baseline, 'w') as file:
+            json.dump(document, file, indent=2)
+            file.write('\n')
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save to make one")
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"regressed: {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
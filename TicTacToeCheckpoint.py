@@ -0,0 +1,133 @@
+"""
+Long simulations that save their progress as they go, and pick up where they
+left off if they're stopped.
+
+    python TicTacToeCheckpoint.py Impossible Random --games 100000000 --checkpoint run.json --seed 1
+
+plays the games a chunk at a time, and after every chunk replaces the
+checkpoint file with the counts so far, the games played and the state of the
+random generator. Running the same command again resumes from the checkpoint,
+and the final counts are exactly what one uninterrupted run with the same seed
+would have got.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from TicTacToeText import Player, play_games
+from TicTacToeTournament import load_player
+
+VERSION = 1
+
+
+def player_spec(player_type: type[Player]) -> str:
+    """The 'module:Class' name of a player type, as load_player takes it."""
+    return f"{player_type.__module__}:{player_type.__name__}"
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Write a checkpoint through a temporary file, so the file on disk is always a whole one."""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint.get('version') != VERSION:
+        raise ValueError(f"{path} isn't a version {VERSION} checkpoint")
+    return checkpoint
+
+
+def random_state(checkpoint: dict) -> tuple:
+    """The random generator state saved in a checkpoint, as random.setstate takes it."""
+    version, internal, gauss_next = checkpoint['random_state']
+    return version, tuple(internal), gauss_next
+
+
+def simulate(player1_type: type[Player], player2_type: type[Player], player1_first: bool = True,
+             games: int = 1000001, checkpoint_path: str = 'simulation.json', every: int = 100000,
+             seed: int | None = None, progress=None) -> tuple[int, int, int]:
+    """
+    Play games between two types of players, saving a checkpoint every so many
+    games, and return (ties, player1 wins, player2 wins). If the checkpoint file
+    already holds a run of the same matchup and seed, carry on from it.
+
+    :param games: how many games the whole run is, which can be more than a resumed run was started with
+    :param checkpoint_path: where to keep the checkpoint
+    :param every: how many games to play between checkpoints
+    :param seed: seeds the random generator at the start of the run
+    :param progress: called with the checkpoint after every chunk, if given
+    """
+    matchup = {'player1': player_spec(player1_type), 'player2': player_spec(player2_type),
+               'player1_first': player1_first, 'seed': seed}
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        started = {key: checkpoint[key] for key in matchup}
+        if started != matchup:
+            raise ValueError(f"{checkpoint_path} is a checkpoint of a different run: {started}")
+        if checkpoint['completed'] > games:
+            raise ValueError(f"{checkpoint_path} has already played {checkpoint['completed']} games, "
+                             f"more than {games}")
+        random.setstate(random_state(checkpoint))
+    else:
+        random.seed(seed)
+        checkpoint = {'version': VERSION, **matchup, 'completed': 0, 'counts': [0, 0, 0]}
+    counts = checkpoint['counts']
+    while checkpoint['completed'] < games:
+        size = min(every, games - checkpoint['completed'])
+        for i, count in enumerate(play_games(player1_type, player2_type, player1_first, size)):
+            counts[i] += count
+        checkpoint['completed'] += size
+        checkpoint['random_state'] = random.getstate()
+        save_checkpoint(checkpoint_path, checkpoint)
+        if progress is not None:
+            progress(checkpoint)
+    return tuple(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a long simulation that checkpoints its progress and "
+                                                 "resumes from the checkpoint.")
+    parser.add_argument('player1', type=load_player)
+    parser.add_argument('player2', type=load_player)
+    parser.add_argument('--second', action='store_true', help='player 1 goes second')
+    parser.add_argument('-n', '--games', type=int, default=1000001)
+    parser.add_argument('--checkpoint', default='simulation.json', help='the checkpoint file to keep and resume from')
+    parser.add_argument('--every', type=int, default=100000, help='games between checkpoints')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    try:
+        checkpoint = load_checkpoint(args.checkpoint)
+    except ValueError as error:
+        parser.error(str(error))
+    resumed_at = checkpoint['completed'] if checkpoint is not None else 0
+    start = time.perf_counter()
+
+    def progress(checkpoint):
+        played = checkpoint['completed'] - resumed_at
+        print(f"{checkpoint['completed']}/{args.games} games, "
+              f"{played / (time.perf_counter() - start):,.0f} games/sec")
+
+    try:
+        num_ties, num_player1_wins, num_player2_wins = simulate(args.player1, args.player2, not args.second,
+                                                                args.games, args.checkpoint, args.every, args.seed,
+                                                                progress)
+    except ValueError as error:
+        parser.error(str(error))
+    print("ties: " + str(num_ties))
+    print("Player1 wins: " + str(num_player1_wins))
+    print("Player2 wins: " + str(num_player2_wins))
+
+
+if __name__ == '__main__':
+    main()
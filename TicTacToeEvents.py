@@ -0,0 +1,201 @@
+"""
+What happens in a game, as events, and the sinks that handle them.
+
+Match.events() plays a game and yields a GameStart, then a Move (or a Rejected
+square, or the moves Undone) for every turn, then a Win or a Tie. run() hands
+every event to every sink, so each front-end only does the work it needs:
+
+    sinks = [ConsoleRenderer(), StatsCounter(), RecordSink(writer)]
+    run(match.events(), sinks)
+
+Each sink buffers its own output and writes it out when it suits it: the
+console once a turn, the log and the record file once a game. Match.play()
+doesn't make events at all, so simulations don't pay for any of this.
+"""
+import logging
+import sys
+from typing import TYPE_CHECKING, Iterable, NamedTuple, TextIO
+
+from TicTacToeRecords import RecordWriter
+
+if TYPE_CHECKING:
+    from TicTacToeText import Match, Player
+
+
+class GameStart(NamedTuple):
+    """A game is about to start, the board is empty and match.curr_player goes first."""
+    match: 'Match'
+
+
+class Move(NamedTuple):
+    """A player took a square."""
+    match: 'Match'
+    player: 'Player'
+    square: int
+
+
+class Rejected(NamedTuple):
+    """A player chose a square that isn't available, and has to choose again."""
+    match: 'Match'
+    player: 'Player'
+
+
+class Undone(NamedTuple):
+    """A player took back their last move and every move since, and it's their turn again."""
+    match: 'Match'
+    player: 'Player'
+    squares: list[int]
+
+
+class Win(NamedTuple):
+    """The game is over and player won."""
+    match: 'Match'
+    player: 'Player'
+
+
+class Tie(NamedTuple):
+    """The game is over and nobody won."""
+    match: 'Match'
+
+
+Event = GameStart | Move | Rejected | Undone | Win | Tie
+
+
+class Sink:
+    """Something that handles events. The base class ignores them all."""
+
+    def handle(self, event: Event):
+        pass
+
+    def flush(self):
+        """Write out anything still buffered."""
+
+
+def run(events: Iterable[Event], sinks: list[Sink]) -> Event | None:
+    """Hand every event to every sink in order, then flush them. Returns the last event, the result."""
+    event = None
+    for event in events:
+        for sink in sinks:
+            sink.handle(event)
+    for sink in sinks:
+        sink.flush()
+    return event
+
+
+def board_text(match: 'Match') -> str:
+    """Draw the board in text, with the square numbers on the empty squares."""
+    board = match.board
+    width = len(str(board.size - 1))
+    cells = [f"{i:>{width}}" for i in range(board.size)]
+    for player, mask in zip(match.players, board.masks):
+        marker = f"{player.tile_type:>{width}}"
+        for square in range(board.size):
+            if mask >> square & 1:
+                cells[square] = marker
+    rows = [" | ".join(cells[i:i + board.width]) for i in range(0, board.size, board.width)]
+    divider = "\n" + "-" * ((width + 3) * board.width - 2) + "\n"
+    return divider.join(rows) + "\n"
+
+
+class ConsoleRenderer(Sink):
+    """
+    Draws the game in the console, with one write per event.
+
+    Attributes
+        - stream: :class:`TextIO` – where to write
+    """
+
+    def __init__(self, stream: TextIO | None = None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def handle(self, event: Event):
+        match = event.match
+        if isinstance(event, (GameStart, Move, Undone)):
+            text = board_text(match) + "\n"
+            if not match.finished:
+                text += f"{match.curr_player.name}'s turn:\n"
+        elif isinstance(event, Rejected):
+            text = f"Try again, that's not an available move\n{event.player.name}'s turn:\n"
+        elif isinstance(event, Win):
+            text = f"{event.player.name} won!!\n"
+        else:
+            text = "It's a tie\n"
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class StatsCounter(Sink):
+    """
+    Counts the results of every game it sees.
+
+    Attributes
+        - ties: :class:`int` – games nobody won
+        - player1_wins: :class:`int` – games the match's player1 won
+        - player2_wins: :class:`int` – games the match's player2 won
+    """
+
+    def __init__(self):
+        self.ties = 0
+        self.player1_wins = 0
+        self.player2_wins = 0
+
+    def handle(self, event: Event):
+        if isinstance(event, Tie):
+            self.ties += 1
+        elif isinstance(event, Win):
+            if event.player is event.match.player1:
+                self.player1_wins += 1
+            else:
+                self.player2_wins += 1
+
+    @property
+    def counts(self) -> tuple[int, int, int]:
+        """(ties, player1 wins, player2 wins), like TicTacToeText.play_games."""
+        return self.ties, self.player1_wins, self.player2_wins
+
+
+class LogSink(Sink):
+    """
+    Logs one line per game, with every move, at INFO.
+
+    Attributes
+        - logger: :class:`logging.Logger` – where to log
+        - lines: :class:`list[str]` – finished games not logged yet
+    """
+
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger if logger is not None else logging.getLogger('tictactoe')
+        self.lines = []
+
+    def handle(self, event: Event):
+        if isinstance(event, (Win, Tie)):
+            match = event.match
+            first, second = match.players
+            result = f"{event.player.name} won" if isinstance(event, Win) else "tie"
+            moves = " ".join(map(str, match.board.moves))
+            self.lines.append(f"{first.name} ({type(first).__name__}) vs {second.name} ({type(second).__name__}): "
+                              f"{moves}, {result}")
+
+    def flush(self):
+        for line in self.lines:
+            self.logger.info(line)
+        self.lines.clear()
+
+
+class RecordSink(Sink):
+    """
+    Appends every finished game to a record file, through the writer's buffer.
+
+    Attributes
+        - writer: :class:`RecordWriter` – the record file to append to
+    """
+
+    def __init__(self, writer: RecordWriter):
+        self.writer = writer
+
+    def handle(self, event: Event):
+        if isinstance(event, (Win, Tie)):
+            self.writer.write_match(event.match)
+
+    def flush(self):
+        self.writer.flush()
@@ -0,0 +1,143 @@
+"""
+Work out the exact chance of each result between two of the 3x3 AIs, instead
+of estimating it from a million games.
+
+    python TicTacToeExact.py Random Impossible
+    python TicTacToeExact.py Random Impossible --second --check 100000
+
+walks every game the two can play, weighting each move by the chance the AI
+picks it. --check also plays that many games and shows how far each count is
+from what's expected, in standard deviations.
+"""
+import argparse
+from fractions import Fraction
+import math
+import time
+
+from TicTacToeText import Board, Player, play_games
+from TicTacToeTournament import load_player
+from TicTacToeVerify import move_distribution, position_key
+
+
+class Odds:
+    """
+    The chances of a tie and of each player winning, for one pairing and seating.
+
+    Attributes
+        - player1_type: :class:`type[Player]` – player 1's AI
+        - player2_type: :class:`type[Player]` – player 2's AI
+        - player1_first: :class:`bool` – whether player 1 goes first
+        - remembers: :class:`int` – how many of the first moves either AI remembers, positions are told apart by them
+        - positions: :class:`int` – positions searched
+        - table: :class:`dict` – (tie, first player wins, second player wins, denominator) from each position
+          searched
+    """
+
+    def __init__(self, player1_type: type[Player], player2_type: type[Player], player1_first: bool = True):
+        self.player1_type = player1_type
+        self.player2_type = player2_type
+        self.player1_first = player1_first
+        self.remembers = max(player1_type.remembers, player2_type.remembers)
+        self.positions = 0
+        self.table = {}
+
+    def probabilities(self) -> tuple[Fraction, Fraction, Fraction]:
+        """Return the chances of (a tie, player 1 winning, player 2 winning)."""
+        player1 = self.player1_type('X', self.player1_type.__name__)
+        player2 = self.player2_type('O', f"{self.player2_type.__name__}2")
+        player1.has_first_turn = self.player1_first
+        player2.has_first_turn = not self.player1_first
+        if self.player1_first:
+            tie, player1_wins, player2_wins, denominator = self.search(Board(), player1, player2)
+        else:
+            tie, player2_wins, player1_wins, denominator = self.search(Board(), player2, player1)
+        return Fraction(tie, denominator), Fraction(player1_wins, denominator), Fraction(player2_wins, denominator)
+
+    def search(self, board: Board, first: Player, second: Player) -> tuple[int, int, int, int]:
+        """
+        Return the chances of (a tie, the first player winning, the second player
+        winning) from the position on board, as numerators over one denominator,
+        which comes last. Moves are placed and unplaced on the board, which is
+        left as it was.
+        """
+        moves = board.moves
+        key = position_key(moves, self.remembers)
+        if key in self.table:
+            return self.table[key]
+        self.positions += 1
+        if moves and board.check_winning_move(moves[-1]):
+            #the side that just moved won
+            odds = (0, 1, 0, 1) if board.turn else (0, 0, 1, 1)
+        elif not board.available:
+            odds = (1, 0, 0, 1)
+        else:
+            #whole numbers over a common denominator, reduced once at the end, are much faster than Fractions
+            tie = first_wins = second_wins = 0
+            denominator = 1
+            first_to_move = board.turn == 0
+            for move, (chance, after) in move_distribution(first if first_to_move else second, board).items():
+                board.place(move)
+                if first_to_move:
+                    result = self.search(board, after, second)
+                else:
+                    result = self.search(board, first, after)
+                board.unplace()
+                #chance times the result, over chance's denominator times the result's
+                child = chance.denominator * result[3]
+                common = math.lcm(denominator, child)
+                scale = common // denominator
+                weight = chance.numerator * (common // child)
+                tie = tie * scale + weight * result[0]
+                first_wins = first_wins * scale + weight * result[1]
+                second_wins = second_wins * scale + weight * result[2]
+                denominator = common
+            divisor = math.gcd(tie, first_wins, second_wins, denominator)
+            odds = (tie // divisor, first_wins // divisor, second_wins // divisor, denominator // divisor)
+        self.table[key] = odds
+        return odds
+
+
+def deviations(counts: tuple[int, int, int], probabilities: tuple[Fraction, Fraction, Fraction]) -> list[float]:
+    """
+    How many standard deviations each count is from what the probabilities
+    expect. A count of something impossible is infinitely far away.
+    """
+    games = sum(counts)
+    result = []
+    for count, probability in zip(counts, probabilities):
+        p = float(probability)
+        spread = math.sqrt(games * p * (1 - p))
+        if spread:
+            result.append((count - games * p) / spread)
+        else:
+            result.append(0.0 if count == games * p else math.inf)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work out the exact chance of each result between two AIs.")
+    parser.add_argument('player1', type=load_player)
+    parser.add_argument('player2', type=load_player)
+    parser.add_argument('--second', action='store_true', help='player 1 goes second')
+    parser.add_argument('--check', type=int, metavar='GAMES',
+                        help='also play this many games and compare the counts with the odds')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    odds = Odds(args.player1, args.player2, not args.second)
+    probabilities = odds.probabilities()
+    elapsed = time.perf_counter() - start
+    print(f"{odds.positions} positions in {elapsed * 1000:.1f}ms")
+    for name, probability in zip(('ties', 'Player1 wins', 'Player2 wins'), probabilities):
+        print(f"{name}: {float(probability):.6f} ({probability})")
+
+    if args.check:
+        counts = play_games(args.player1, args.player2, not args.second, args.check)
+        print(f"{args.check} games:")
+        for name, count, probability, deviation in zip(('ties', 'Player1 wins', 'Player2 wins'), counts,
+                                                       probabilities, deviations(counts, probabilities)):
+            print(f"{name}: {count}, expected {args.check * float(probability):.1f}, {deviation:+.2f} sd")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,18 @@
-from TicTacToeText import Impossible, Player, Random, RandomNotStupid
+import argparse
+from functools import lru_cache
+import os
+import subprocess
+import sys
+
+from TicTacToeEvents import Event, GameStart, Move, RecordSink, Sink, Tie, Undone, Win, run
+from TicTacToeRecords import RecordWriter
+from TicTacToeText import UNDO, Board, Impossible, Match, Perfect, Player, Random, RandomNotStupid, board_options
 import pygame
 
-pygame.init()
 # constants
-# fonts
-SMALL_FONT = pygame.font.SysFont('arialblack', 20)
-END_FONT = pygame.font.SysFont('arialblack', 40)
+# font sizes
+SMALL_FONT = 20
+END_FONT = 40
 #colours
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -19,10 +26,16 @@ DARK_TEAL = (35, 183, 179)
 #display
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-#board edges and lines
-BOARD_LINES = [75, 225, 375, 525]
-
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+#board position and size in pixels, the squares are scaled to fit
+BOARD_LEFT = 75
+BOARD_TOP = 75
+BOARD_SIZE = 450
+#where the undo button goes, beside the board
+UNDO_LEFT = 600
+UNDO_TOP = 450
+#startup budgets in seconds, see startup_times
+IMPORT_BUDGET = 0.5
+FIRST_FRAME_BUDGET = 0.75
 
 
 class Human(Player):
@@ -33,38 +46,28 @@ class Human(Player):
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
     """
+    __slots__ = ()
 
     def __init__(self, tile_type, name):
         super().__init__(tile_type, name)
 
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
-        """Returns which square the player wants to play their move on."""
-        while True:
-            mouse = pygame.mouse.get_pos()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    quit()
-                #check if a tile is clicked on
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if BOARD_LINES[0] <= mouse[0] <= BOARD_LINES[1] and BOARD_LINES[0] <= mouse[1] <= BOARD_LINES[1]:
-                        return 0
-                    elif BOARD_LINES[1] <= mouse[0] <= BOARD_LINES[2] and BOARD_LINES[0] <= mouse[1] <= BOARD_LINES[1]:
-                        return 1
-                    elif BOARD_LINES[2] <= mouse[0] <= BOARD_LINES[3] and BOARD_LINES[0] <= mouse[1] <= BOARD_LINES[1]:
-                        return 2
-                    elif BOARD_LINES[0] <= mouse[0] <= BOARD_LINES[1] and BOARD_LINES[1] <= mouse[1] <= BOARD_LINES[2]:
-                        return 3
-                    elif BOARD_LINES[1] <= mouse[0] <= BOARD_LINES[2] and BOARD_LINES[1] <= mouse[1] <= BOARD_LINES[2]:
-                        return 4
-                    elif BOARD_LINES[2] <= mouse[0] <= BOARD_LINES[3] and BOARD_LINES[1] <= mouse[1] <= BOARD_LINES[2]:
-                        return 5
-                    elif BOARD_LINES[0] <= mouse[0] <= BOARD_LINES[1] and BOARD_LINES[2] <= mouse[1] <= BOARD_LINES[3]:
-                        return 6
-                    elif BOARD_LINES[1] <= mouse[0] <= BOARD_LINES[2] and BOARD_LINES[2] <= mouse[1] <= BOARD_LINES[3]:
-                        return 7
-                    elif BOARD_LINES[2] <= mouse[0] <= BOARD_LINES[3] and BOARD_LINES[2] <= mouse[1] <= BOARD_LINES[3]:
-                        return 8
+    def move(self, board: Board) -> int:
+        """Returns which square the player wants to play their move on, or UNDO."""
+        cell = cell_size(board)
+        undo = Button(pygame.display.get_surface(), LIGHT_GREY, GREY, UNDO_LEFT, UNDO_TOP, 'Undo')
+        pygame.display.update(undo.rect)
+
+        def on_click(mouse):
+            if undo.on_button(mouse):
+                return UNDO
+            #check if a tile is clicked on
+            column = (mouse[0] - BOARD_LEFT) // cell
+            row = (mouse[1] - BOARD_TOP) // cell
+            if 0 <= column < board.width and 0 <= row < board.height:
+                return column + row * board.width
+            return None
+
+        return scene_loop([undo], on_click)
 
 
 class Button:
@@ -81,7 +84,9 @@ class Button:
         - left: :class:`int` – the left x-coordinate
         - right: :class:`int` – the left x-coordinate
         - message: :class:`str` – the button's text
+        - hovered: :class:`bool` – whether the button is currently drawn in its hover colour
         - clicked: :class:`bool` – whether the button is currently selected/clicked
+        - rect: :class:`pygame.Rect` – the area the button covers, border included
     """
     def __init__(self, screen, colour: tuple[int, int, int], hover_colour: tuple[int, int, int],
                  x: int, y: int, message: str):
@@ -104,29 +109,27 @@ class Button:
         self.left = x
         self.right = None
         self.border = 3
+        self.hovered = False
         self.clicked = False
+        self.rect = None
         self.draw_button(False, False)
 
-    def draw_button(self, hover: bool, clicked: bool):
+    def draw_button(self, hover: bool, clicked: bool) -> pygame.Rect:
         """
-        Draw the button
+        Draw the button, and return the area drawn.
         
         :param hover: whether the button is currently hovered over
         :param clicked: whether the button is currently clicked/selected
         """
-        text_surface = SMALL_FONT.render(self.message, True, BLACK)
-        text_rect = text_surface.get_rect()
-        self.bottom = self.top + text_rect.h + 20
-        self.right = self.left + text_rect.w + 40
         colour = self.colour if hover is False else self.hover_colour
-        btn = pygame.draw.rect(screen, colour, (self.left, self.top, text_rect.w + 40, text_rect.h + 20))
-        self.clicked = clicked
         border_colour = WHITE if clicked is False else BLACK
-        pygame.draw.rect(screen, border_colour, (self.left - self.border, self.top - self.border,
-                                                 text_rect.w + 40 + 2 * self.border,
-                                                 text_rect.h + 20 + 2 * self.border), self.border)
-        text_rect.center = btn.center
-        screen.blit(text_surface, text_rect.topleft)
+        surface = button_surface(self.message, colour, border_colour, self.border)
+        self.hovered = hover
+        self.clicked = clicked
+        self.rect = self.screen.blit(surface, (self.left - self.border, self.top - self.border))
+        self.bottom = self.rect.bottom - self.border
+        self.right = self.rect.right - self.border
+        return self.rect
         
     def on_button(self, mouse) -> bool:
         """Return true if the mouse is over the button, False otherwise."""
@@ -134,13 +137,16 @@ class Button:
             return True
         return False
     
-    def hover_on(self, mouse):
-        """Change the button colour if the button is currently hovered over."""
+    def hover_on(self, mouse) -> pygame.Rect | None:
+        """
+        Change the button colour if the mouse moved onto or off the button.
+        Returns the area redrawn, or None if nothing changed.
+        """
         if self.clicked is False:
-            if self.on_button(mouse):
-                self.draw_button(True, False)
-            else:
-                self.draw_button(False, False)
+            hover = self.on_button(mouse)
+            if hover != self.hovered:
+                return self.draw_button(hover, False)
+        return None
 
 
 def choose_type(message, tile_type: str, name: str) -> Player:
@@ -151,67 +157,90 @@ def choose_type(message, tile_type: str, name: str) -> Player:
         return Random(tile_type, name)
     elif message == 'Intermediate':
         return RandomNotStupid(tile_type, name)
+    elif message == 'Perfect':
+        return Perfect(tile_type, name)
     else:
         return Impossible(tile_type, name)
 
 
-class Game(object):
+class Game(Match):
     """
-    A game of tic-tac-toe.
+    A game of tic-tac-toe in a pygame window, against another person or an AI.
     
     Attributes:
-        board: a representation of the tic-tac-toe board
-        available: a set of all available moves
+        screen: the window to play in
+        board: the current position
         player1: a Player of the game
         player2: another Player of the game
         curr_player: the Player whose turn it is currently
     """
 
-    def __init__(self):
-        self.board = [f"{i}" for i in range(9)]
-        self.available = {i for i in range(9)}
-        self.player1 = Human('X', 'Human')
-        mode, goes_first = game_options()
-        self.player2 = choose_type(mode, 'O', 'Player 2')
-        self.player1.has_first_turn = goes_first
-        self.player2.has_first_turn = not self.player1.has_first_turn
-        self.curr_player = self.player1 if self.player1.has_first_turn is True else self.player2
-
-    def get_other_player(self):
-        return self.player1 if self.curr_player is self.player2 else self.player2
-
-    def validate_move(self, move: int) -> bool:
-        """Make a move if it's an available square."""
-        if move in self.available:
-            self.available.remove(move)
-            self.curr_player.all_moves.append(move)
-            return True
-        return False
+    def __init__(self, screen: pygame.Surface, width: int = 3, height: int = 3, k: int = 3):
+        """
+        :param screen: the window to play in, from start_display
+        :param width: number of columns
+        :param height: number of rows
+        :param k: how many in a row wins
+        """
+        self.screen = screen
+        player1 = Human('X', 'Human')
+        mode, goes_first = game_options(screen, (width, height, k) == (3, 3, 3))
+        player2 = choose_type(mode, 'O', 'Player 2')
+        super().__init__(player1, player2, goes_first, width, height, k)
 
-    def play_game(self):
-        """Plays a game of tic-tac-toe."""
-        paint_board()
-        pygame.display.update()
-        moves = 0
-        while moves < 9:
-            #print(f"{self.curr_player.name}'s turn:")
-            if not isinstance(self.curr_player, Human):
-                pygame.time.delay(500)
-            move = self.curr_player.move(self.curr_player.has_first_turn, self.available,
-                                         self.get_other_player().all_moves)
-            self.board[move] = self.curr_player.tile_type
-            if self.validate_move(move) is False:
-                continue
-            paint_marker(self.curr_player.tile_type, move)
-            pygame.display.update()
-            if self.curr_player.check_winning_move(move) is True:
-                end_screen(f"{self.curr_player.name} won!!")
-                return 'win'
-            moves += 1
-            self.curr_player = self.get_other_player()
-        if moves == 9:
-            end_screen('It\'s a tie')
-            return 'tie'
+    def play_game(self, sinks: list[Sink] | None = None):
+        """
+        Plays a game of tic-tac-toe in the window.
+
+        :param sinks: anything else to hand the game's events to, like a RecordSink
+        """
+        result = run(self.events(), [PygameRenderer(self.screen)] + (sinks or []))
+        return 'win' if isinstance(result, Win) else 'tie'
+
+
+class PygameRenderer(Sink):
+    """
+    Draws the game in the window, pushing only the parts that changed to the
+    display, once per event. Waits a moment before each AI move so it can be seen.
+
+    Attributes
+        - screen: :class:`pygame.Surface` – the window to draw in
+        - dirty: :class:`list[pygame.Rect]` – areas drawn and not pushed to the display yet
+    """
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.dirty = []
+
+    def handle(self, event: Event):
+        match = event.match
+        if isinstance(event, GameStart):
+            paint_board(self.screen, match.board)
+            self.dirty.append(self.screen.get_rect())
+        elif isinstance(event, Move):
+            self.dirty.append(paint_marker(self.screen, event.player.tile_type, event.square, match.board))
+        elif isinstance(event, Undone):
+            #repaint the board with the moves that are left
+            paint_board(self.screen, match.board)
+            for i, square in enumerate(match.board.moves):
+                paint_marker(self.screen, match.players[i & 1].tile_type, square, match.board)
+            self.dirty.append(self.screen.get_rect())
+        elif isinstance(event, Win):
+            self.dirty.append(end_screen(self.screen, f"{event.player.name} won!!"))
+        elif isinstance(event, Tie):
+            self.dirty.append(end_screen(self.screen, 'It\'s a tie'))
+        if isinstance(event, (Win, Tie)):
+            #there's nothing left to undo
+            self.dirty.append(self.screen.fill(WHITE, (UNDO_LEFT - 3, UNDO_TOP - 3, SCREEN_WIDTH, SCREEN_HEIGHT)))
+        self.flush()
+        if isinstance(event, (GameStart, Move, Undone)) and not match.finished \
+                and not isinstance(match.curr_player, Human):
+            pygame.time.wait(500)
+
+    def flush(self):
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty.clear()
 
 
 def button_row(screen, x: int, y: int, colour: tuple[int, int, int],
@@ -234,6 +263,35 @@ def button_row(screen, x: int, y: int, colour: tuple[int, int, int],
     return btns
 
 
+def scene_loop(buttons: list[Button], on_click):
+    """
+    Run a screen until on_click returns something other than None. Sleeps until
+    there's an event instead of polling, and only pushes the parts of the screen
+    that changed to the display.
+
+    :param buttons: the buttons on the screen, which change colour when hovered over
+    :param on_click: called with the mouse position on every click
+    """
+    while True:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            quit()
+        elif event.type == pygame.MOUSEMOTION:
+            #change colour of buttons the mouse moved onto or off
+            dirty = [rect for rect in (btn.hover_on(event.pos) for btn in buttons) if rect is not None]
+            if dirty:
+                pygame.display.update(dirty)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            result = on_click(event.pos)
+            if buttons:
+                pygame.display.update([btn.rect for btn in buttons])
+            if result is not None:
+                return result
+        elif event.type == pygame.WINDOWEXPOSED:
+            pygame.display.update()
+
+
 def click_btn_row(mouse, btn_list: list[Button], var: str) -> str:
     """Click a radio type button in a row, then un-click the rest of the buttons."""
     for btn in btn_list:
@@ -246,110 +304,177 @@ def click_btn_row(mouse, btn_list: list[Button], var: str) -> str:
     return var
     
 
-def game_options():
-    """Game options screen. Get the type of opponent and whether player 1 wants to go first."""
+def options_screen(screen: pygame.Surface, classic: bool = True) -> tuple[list[Button], list[Button], Button]:
+    """
+    Draw the game options screen, and return the opponent buttons, the turn buttons and the start button.
+    Impossible and Perfect are only offered on the classic 3x3 board.
+    """
     screen.fill(WHITE)
-    mode_buttons = button_row(screen, 30, 150, TEAL, DARK_TEAL, ['Multiplayer', 'Easy', 'Intermediate', 'Impossible'])
+    if classic:
+        mode_buttons = button_row(screen, 30, 150, TEAL, DARK_TEAL,
+                                  ['Multiplayer', 'Easy', 'Intermediate', 'Impossible'])
+        mode_buttons += button_row(screen, 30, 220, TEAL, DARK_TEAL, ['Perfect'])
+    else:
+        mode_buttons = button_row(screen, 30, 150, TEAL, DARK_TEAL, ['Multiplayer', 'Easy', 'Intermediate'])
     turn_buttons = button_row(screen, 30, 300, TEAL, DARK_TEAL, ['Go First', 'Go Second'])
     turn_buttons[0].draw_button(True, True)
     start = Button(screen, GREEN, DARK_GREEN, 350, 450, 'Start')
+    return mode_buttons, turn_buttons, start
+
+
+def game_options(screen: pygame.Surface, classic: bool = True):
+    """Game options screen. Get the type of opponent and whether player 1 wants to go first."""
+    mode_buttons, turn_buttons, start = options_screen(screen, classic)
     all_buttons = mode_buttons + turn_buttons + [start]
     
     mode = ''
     goes_first = 'Go First'
 
-    while True:
-        mouse = pygame.mouse.get_pos()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
-            #check for button clicks
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mode = click_btn_row(mouse, mode_buttons, mode)
-                goes_first = click_btn_row(mouse, turn_buttons, goes_first)
-                if start.on_button(mouse) and mode != '':
-                    return mode, True if goes_first == 'Go First' else False
-            #change colour of button if hovering it
-            for btn in all_buttons:
-                btn.hover_on(mouse)
-        pygame.display.update()
-
-
-def paint_board():
-    """Draw the tic-tac-toe board."""
-    screen.fill(WHITE)
-    pygame.draw.line(screen, BLACK, (BOARD_LINES[1], BOARD_LINES[0]), (BOARD_LINES[1], BOARD_LINES[3]), 5)
-    pygame.draw.line(screen, BLACK, (BOARD_LINES[2], BOARD_LINES[0]), (BOARD_LINES[2], BOARD_LINES[3]), 5)
-    pygame.draw.line(screen, BLACK, (BOARD_LINES[0], BOARD_LINES[1]), (BOARD_LINES[3], BOARD_LINES[1]), 5)
-    pygame.draw.line(screen, BLACK, (BOARD_LINES[0], BOARD_LINES[2]), (BOARD_LINES[3], BOARD_LINES[2]), 5)
-
-
-def get_x(square: int) -> int:
-    """Return the x-coordinate based on the square."""
-    if square == 0 or square == 3 or square == 6:
-        return BOARD_LINES[0] + 25
-    elif square == 1 or square == 4 or square == 7:
-        return BOARD_LINES[1] + 25
+    def on_click(mouse):
+        nonlocal mode, goes_first
+        mode = click_btn_row(mouse, mode_buttons, mode)
+        goes_first = click_btn_row(mouse, turn_buttons, goes_first)
+        if start.on_button(mouse) and mode != '':
+            return mode, True if goes_first == 'Go First' else False
+        return None
+
+    pygame.display.update()
+    return scene_loop(all_buttons, on_click)
+
+
+def start_display() -> pygame.Surface:
+    """Start up pygame's display and open the window."""
+    pygame.display.init()
+    pygame.display.set_caption('tic-tac-toe')
+    return pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+@lru_cache
+def font(size: int) -> pygame.font.Font:
+    """Look up the font the first time it's needed, which scans the system fonts."""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont('arialblack', size)
+
+
+@lru_cache
+def text_surface(text: str, colour: tuple[int, int, int], size: int) -> pygame.Surface:
+    """Render text once, and hand back the same surface every time after."""
+    return font(size).render(text, True, colour)
+
+
+@lru_cache
+def button_surface(message: str, colour: tuple[int, int, int], border_colour: tuple[int, int, int],
+                   border: int) -> pygame.Surface:
+    """Draw a button, border and all, for one of its states."""
+    text = text_surface(message, BLACK, SMALL_FONT)
+    text_rect = text.get_rect()
+    surface = pygame.Surface((text_rect.w + 40 + 2 * border, text_rect.h + 20 + 2 * border))
+    surface.fill(border_colour)
+    btn = surface.fill(colour, surface.get_rect().inflate(-2 * border, -2 * border))
+    text_rect.center = btn.center
+    surface.blit(text, text_rect.topleft)
+    return surface
+
+
+@lru_cache
+def marker_surface(tile_type: str, cell: int) -> pygame.Surface:
+    """Draw a marker on a transparent square, cell pixels wide."""
+    surface = pygame.Surface((cell, cell), pygame.SRCALPHA)
+    #markers are 100px with 10px lines on the 150px squares of a 3x3 board
+    x = y = cell // 6
+    size = cell * 2 // 3
+    if tile_type == 'X':
+        width = max(2, cell // 15)
+        pygame.draw.line(surface, BLACK, (x, y), (x + size, y + size), width)
+        pygame.draw.line(surface, BLACK, (x, y + size), (x + size, y), width)
     else:
-        return BOARD_LINES[2] + 25
+        pygame.draw.circle(surface, BLACK, (x + size // 2, y + size // 2), size // 2, width=max(2, cell * 7 // 150))
+    return surface
 
 
-def get_y(square: int) -> int:
-    """Return the y-coordinate based on the square."""
-    if square == 0 or square == 1 or square == 2:
-        return BOARD_LINES[0] + 25
-    elif square == 3 or square == 4 or square == 5:
-        return BOARD_LINES[1] + 25
-    else:
-        return BOARD_LINES[2] + 25
+def cell_size(board: Board) -> int:
+    """Return the width of a square in pixels, so the whole board fits in the board area."""
+    return BOARD_SIZE // max(board.width, board.height)
 
 
-def paint_marker(tile_type: str, square: int):
-    """Draw the tile marker on the square."""
-    x = get_x(square)
-    y = get_y(square)
-    if tile_type == 'X':
-        pygame.draw.line(screen, BLACK, (x, y), (x + 100, y + 100), 10)
-        pygame.draw.line(screen, BLACK, (x, y + 100), (x + 100, y), 10)
-    else:
-        pygame.draw.circle(screen, BLACK, (x + 50, y + 50), 50, width=7)
+def paint_board(screen: pygame.Surface, board: Board):
+    """Draw the tic-tac-toe board."""
+    screen.fill(WHITE)
+    cell = cell_size(board)
+    right = BOARD_LEFT + board.width * cell
+    bottom = BOARD_TOP + board.height * cell
+    #5px lines on the 150px squares of a 3x3 board
+    width = max(1, cell // 30)
+    for column in range(1, board.width):
+        x = BOARD_LEFT + column * cell
+        pygame.draw.line(screen, BLACK, (x, BOARD_TOP), (x, bottom), width)
+    for row in range(1, board.height):
+        y = BOARD_TOP + row * cell
+        pygame.draw.line(screen, BLACK, (BOARD_LEFT, y), (right, y), width)
+
+
+def paint_marker(screen: pygame.Surface, tile_type: str, square: int, board: Board) -> pygame.Rect:
+    """Draw the tile marker on the square, and return the square's area."""
+    cell = cell_size(board)
+    return screen.blit(marker_surface(tile_type, cell),
+                       (BOARD_LEFT + square % board.width * cell, BOARD_TOP + square // board.width * cell))
     
     
-def game_loop():
-    """Play the game until the user quits."""
+def game_loop(width: int = 3, height: int = 3, k: int = 3, record: str | None = None):
+    """
+    Play the game until the user quits.
+
+    :param record: a record file to append every finished game to, 3x3 boards only
+    """
+    sinks = [RecordSink(RecordWriter(record))] if record is not None else []
+    screen = start_display()
     while True:
-        g = Game()
-        g.play_game()
+        g = Game(screen, width, height, k)
+        g.play_game(sinks)
 
-        play_again = False
         again = Button(screen, GREEN, DARK_GREEN, 600, 150, "Play Again")
-        while True:
-            mouse = pygame.mouse.get_pos()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    quit()
-                #check for button clicks
-                if event.type == pygame.MOUSEBUTTONDOWN and again.on_button(mouse):
-                    play_again = True
-            #if clicked 'play again' button, play another game
-            if play_again is True:
-                break
-            #change colour of button if hovering it
-            again.hover_on(mouse)
-            pygame.display.update()
+        pygame.display.update(again.rect)
+        #if clicked 'play again' button, play another game
+        scene_loop([again], lambda mouse: True if again.on_button(mouse) else None)
 
 
-def end_screen(end_message: str):
-    """Draw the message letting the player know if there was a tie or a win."""
-    text_surface = END_FONT.render(end_message, True, PURPLE)
-    text_rect = text_surface.get_rect()
-    text_rect.centerx = pygame.display.get_surface().get_rect().centerx
+def end_screen(screen: pygame.Surface, end_message: str) -> pygame.Rect:
+    """Draw the message letting the player know if there was a tie or a win, and return its area."""
+    surface = text_surface(end_message, PURPLE, END_FONT)
+    text_rect = surface.get_rect()
+    text_rect.centerx = screen.get_rect().centerx
     text_rect.centery = 30
-    screen.blit(text_surface, text_rect.topleft)
-    pygame.display.update()
+    return screen.blit(surface, text_rect.topleft)
+
+
+def startup_times() -> tuple[float, float]:
+    """
+    Start the game in a new process and return how long importing this module
+    took, and how long it took to get the first frame on screen after starting.
+    """
+    child = ("import time\n"
+             "start = time.perf_counter()\n"
+             "import TicTacToeGraphics, pygame\n"
+             "imported = time.perf_counter()\n"
+             "TicTacToeGraphics.options_screen(TicTacToeGraphics.start_display())\n"
+             "pygame.display.update()\n"
+             "print(imported - start, time.perf_counter() - start)\n")
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run([sys.executable, '-c', child], capture_output=True, text=True, check=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    imported, first_frame = output.split()
+    return float(imported), float(first_frame)
 
 
 if __name__ == '__main__':
-    game_loop()
+    parser = argparse.ArgumentParser(description="Play m,n,k tic-tac-toe in a window, 3x3 with 3 in a row by default.")
+    parser.add_argument('--startup-time', action='store_true',
+                        help='measure the time to import and to the first frame instead of playing')
+    options = board_options(parser)
+    if options.startup_time:
+        imported, first_frame = startup_times()
+        print(f"import: {imported * 1000:.0f}ms (budget {IMPORT_BUDGET * 1000:.0f}ms), "
+              f"first frame: {first_frame * 1000:.0f}ms (budget {FIRST_FRAME_BUDGET * 1000:.0f}ms)")
+        sys.exit(imported > IMPORT_BUDGET or first_frame > FIRST_FRAME_BUDGET)
+    game_loop(options.width, options.height, options.k, options.record)
@@ -0,0 +1,256 @@
+"""
+A tic-tac-toe AI that learns by playing, with a value for every position kept
+in a flat array indexed by the position's base-3 code (needs numpy).
+
+    python TicTacToeLearn.py --opponent Random --episodes 2000000 --checkpoint learner.npy
+    python TicTacToeLearn.py --opponent self --episodes 2000000 --checkpoint learner.npy --resume
+
+trains in batches of games played in lockstep, saving a checkpoint after each
+report. Each report gives episodes/sec and the learner's exact chances against
+Impossible in both seatings. A checkpoint is an .npy file that's memory-mapped
+when it's loaded, so a trained Learner starts instantly.
+"""
+import argparse
+from functools import lru_cache
+import os
+import random
+import time
+
+import numpy as np
+
+from TicTacToeBatch import HAS_LINE, POLICIES, random_moves, random_not_stupid_moves
+from TicTacToeExact import Odds
+from TicTacToeText import Board, Impossible, Player, full_board, squares
+from TicTacToeTournament import load_player
+
+NUM_POSITIONS = 3 ** 9
+POW3 = 3 ** np.arange(9, dtype=np.int64)
+# the base-3 code of a mask of first player squares, the second player's squares count double
+MASK_CODES = np.array([sum(3 ** square for square in squares[mask]) for mask in range(full_board + 1)],
+                      dtype=np.int64)
+DEFAULT_CHECKPOINT = 'learner.npy'
+
+
+def initial_values() -> np.ndarray:
+    """
+    A value for every position: the chance the side that just moved goes on to
+    win, counting a tie as half. Won and tied positions are already known and
+    everything else starts at a half.
+    """
+    digits = np.arange(NUM_POSITIONS)[:, None] // POW3 % 3
+    first = ((digits == 1) << np.arange(9)).sum(axis=1)
+    second = ((digits == 2) << np.arange(9)).sum(axis=1)
+    first_count = (digits == 1).sum(axis=1)
+    second_count = (digits == 2).sum(axis=1)
+    #the first player just moved if they have more squares
+    mover = np.where(first_count > second_count, first, second)
+    values = np.full(NUM_POSITIONS, 0.5, dtype=np.float32)
+    values[HAS_LINE[mover]] = 1.0
+    return values
+
+
+def save_values(path: str, values: np.ndarray):
+    """Write a checkpoint, through a temporary file so a crash never leaves half of one."""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        np.save(file, values)
+    os.replace(temporary, path)
+
+
+@lru_cache
+def load_values(path: str = DEFAULT_CHECKPOINT) -> np.ndarray:
+    """Memory-map a checkpoint, read-only."""
+    return np.load(path, mmap_mode='r')
+
+
+class Learner(Player):
+    """
+    An AI player that always makes the move leading to the position with the
+    best learned value. Only plays the classic 3x3 board.
+
+    Attributes
+        - tile_type: :class:`str` – which marker this player puts down
+        - name: :class:`str` – the name of this player
+        - values: :class:`numpy.ndarray` – the value of every position, by base-3 code
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, tile_type, name, values: np.ndarray | None = None):
+        """:param values: learned values, or None to load DEFAULT_CHECKPOINT"""
+        super().__init__(tile_type, name)
+        self.values = values if values is not None else load_values()
+
+    def move(self, board: Board) -> int:
+        code = int(MASK_CODES[board.masks[0]] + 2 * MASK_CODES[board.masks[1]])
+        piece = 1 + board.turn
+        values = self.values
+        best_move = None
+        best_value = -1.0
+        for square in squares[board.available]:
+            value = values[code + piece * 3 ** square]
+            if value > best_value:
+                best_move = square
+                best_value = value
+        return best_move
+
+
+def learner_type(values: np.ndarray) -> type[Player]:
+    """Return a Learner class with values built in, for anything that makes its own players."""
+    class BoundLearner(Learner):
+        __slots__ = ()
+
+        def __init__(self, tile_type, name):
+            super().__init__(tile_type, name, values)
+
+    BoundLearner.__name__ = BoundLearner.__qualname__ = 'Learner'
+    return BoundLearner
+
+
+def update(values: np.ndarray, positions: np.ndarray, targets: np.ndarray, alpha: float):
+    """
+    Move each position's value alpha of the way to its target. A position that
+    turns up more than once in a batch moves towards the average of its targets.
+    """
+    if not len(positions):
+        return
+    change = np.bincount(positions, weights=targets - values[positions], minlength=NUM_POSITIONS)
+    count = np.bincount(positions, minlength=NUM_POSITIONS)
+    seen = count > 0
+    values[seen] += (alpha * change[seen] / count[seen]).astype(np.float32)
+
+
+def train_batch(values: np.ndarray, opponent: str, n: int, rng: np.random.Generator,
+                epsilon: float = 0.1, alpha: float = 0.1) -> tuple[int, int, int]:
+    """
+    Play n games in lockstep and learn from them, the learner going first in
+    half of them. Each of the learner's positions moves towards the value of
+    its next one, or the result if the opponent ends the game.
+
+    :param values: the values to learn, updated in place
+    :param opponent: 'Random' or 'RandomNotStupid' (played in batch), 'self', or any player load_player takes
+    :param epsilon: how often the learner tries a random move instead of its best one
+    :param alpha: the learning rate
+    :returns: (ties, learner wins, learner losses), not counting self-play
+    """
+    masks = np.zeros((2, n), dtype=np.int64)
+    codes = np.zeros(n, dtype=np.int64)
+    winner = np.full(n, -1, dtype=np.int64)
+    previous = np.full((2, n), -1, dtype=np.int64)
+    self_play = opponent == 'self'
+    learner_side = np.arange(n) & 1
+    boards = players = None
+    if not self_play and opponent not in POLICIES:
+        #anything else plays one game at a time on its own board
+        player_type = load_player(opponent)
+        boards = [Board() for _ in range(n)]
+        players = [player_type('O', opponent) for _ in range(n)]
+        for game, player in enumerate(players):
+            player.has_first_turn = bool(game & 1)
+    active = np.arange(n)
+    for ply in range(9):
+        side = ply & 1
+        mine = masks[side, active]
+        theirs = masks[side ^ 1, active]
+        available = full_board ^ (mine | theirs)
+        learning = np.ones(len(active), dtype=bool) if self_play else learner_side[active] == side
+        moves = np.empty(len(active), dtype=np.int64)
+
+        #the learner takes the best move, or now and then a random one
+        open_squares = (available[learning, None] >> np.arange(9) & 1).astype(bool)
+        candidates = np.where(open_squares, codes[active[learning], None] + (1 + side) * POW3, 0)
+        candidate_values = np.where(open_squares, values[candidates], -1.0)
+        best = candidate_values.argmax(axis=1)
+        explore = rng.random(len(best)) < epsilon
+        moves[learning] = np.where(explore, random_moves(available[learning], rng), best)
+
+        playing = ~learning
+        if opponent == 'Random':
+            moves[playing] = random_moves(available[playing], rng)
+        elif opponent == 'RandomNotStupid':
+            moves[playing] = random_not_stupid_moves(mine[playing], theirs[playing], available[playing], rng)
+        elif boards is not None:
+            for i in np.flatnonzero(playing):
+                game = active[i]
+                moves[i] = players[game].move(boards[game])
+        if boards is not None:
+            for game, move in zip(active.tolist(), moves.tolist()):
+                boards[game].place(move)
+
+        mine |= 1 << moves
+        masks[side, active] = mine
+        codes[active] += (1 + side) * POW3[moves]
+        learners = active[learning]
+        last = previous[side, learners]
+        known = last >= 0
+        update(values, last[known], values[codes[learners[known]]], alpha)
+        previous[side, learners] = codes[learners]
+
+        won = HAS_LINE[mine]
+        winner[active[won]] = side
+        ended = won | (ply == 8)
+        #the other side's last position led to a loss or a tie
+        losers = active[ended]
+        if not self_play:
+            losers = losers[learner_side[losers] != side]
+        last = previous[side ^ 1, losers]
+        known = last >= 0
+        update(values, last[known], np.where(winner[losers[known]] == side, 0.0, 0.5), alpha)
+        active = active[~ended]
+    if self_play:
+        return 0, 0, 0
+    learner_wins = int(np.count_nonzero(winner == learner_side))
+    ties = int(np.count_nonzero(winner < 0))
+    return ties, learner_wins, n - ties - learner_wins
+
+
+def against_impossible(values: np.ndarray) -> list[tuple[float, float, float]]:
+    """The learner's exact (tie, win, loss) chances against Impossible, going first and going second."""
+    player_type = learner_type(values)
+    return [tuple(map(float, Odds(player_type, Impossible, first).probabilities())) for first in (True, False)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a learning AI by playing it against another AI or itself.")
+    parser.add_argument('--opponent', default='Random',
+                        help="Random, RandomNotStupid, Impossible, Perfect, 'module:Class' or 'self'")
+    parser.add_argument('--episodes', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=4096, help='games played in lockstep')
+    parser.add_argument('--report', type=int, default=100000, help='episodes between reports and checkpoints')
+    parser.add_argument('--epsilon', type=float, default=0.1, help='how often to explore a random move')
+    parser.add_argument('--alpha', type=float, default=0.1, help='the learning rate')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument('--resume', action='store_true', help='start from the checkpoint')
+    parser.add_argument('--seed', type=int, help='seeds numpy and the random module, so a run can be repeated')
+    args = parser.parse_args()
+    if args.opponent != 'self':
+        try:
+            load_player(args.opponent)
+        except ValueError as error:
+            parser.error(str(error))
+
+    values = np.array(load_values(args.checkpoint)) if args.resume else initial_values()
+    rng = np.random.default_rng(args.seed)
+    #opponents that aren't played in batch, like Impossible, pick with the random module
+    random.seed(args.seed)
+    episodes = 0
+    training = 0.0
+    while episodes < args.episodes:
+        counts = [0, 0, 0]
+        target = min(args.episodes, episodes + args.report)
+        start = time.perf_counter()
+        while episodes < target:
+            size = min(args.batch, target - episodes)
+            for i, count in enumerate(train_batch(values, args.opponent, size, rng, args.epsilon, args.alpha)):
+                counts[i] += count
+            episodes += size
+        training += time.perf_counter() - start
+        save_values(args.checkpoint, values)
+        first, second = against_impossible(values)
+        line = f"{episodes} episodes, {episodes / training:,.0f} episodes/sec"
+        if args.opponent != 'self':
+            line += f", training results {counts[1]} won {counts[0]} tied {counts[2]} lost"
+        print(f"{line}; vs Impossible going first: {first[2]:.1%} lost, going second: {second[2]:.1%} lost")
+
+
+if __name__ == '__main__':
+    main()
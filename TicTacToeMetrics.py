@@ -0,0 +1,245 @@
+"""
+Opt-in instrumentation: how long each kind of player takes to move, games per
+second, and which of Impossible's strategies chose each move.
+
+    import TicTacToeMetrics
+    metrics = TicTacToeMetrics.enable()
+    ... play games ...
+    print(metrics.to_prometheus())
+    TicTacToeMetrics.disable()
+
+enable() wraps Player.move on every Player subclass defined so far,
+Match.make_move and Impossible's strategy methods, and disable() puts the
+originals back, so nothing is measured and nothing costs anything until it's
+turned on.
+
+    python TicTacToeMetrics.py Impossible Random --games 10000 --format json
+
+plays some games with metrics on and prints them.
+"""
+import argparse
+from bisect import bisect_left
+import json
+import threading
+import time
+
+from TicTacToeText import Impossible, Match, Player, play_games
+from TicTacToeTournament import load_player
+
+# move latency histogram bucket bounds in seconds, 1µs doubling up to about 1s
+BUCKETS = tuple(2 ** i / 1_000_000 for i in range(21))
+# Impossible's strategy methods, counted each time one chooses a move
+IMPOSSIBLE_BRANCHES = ('goes_first_or_middle_case', 'corner_case', 'edge_case', 'random_move')
+
+
+class Histogram:
+    """
+    Move latencies, counted into BUCKETS.
+
+    Attributes
+        - counts: :class:`list[int]` – moves at or under each bucket bound and over the one before, then over the last
+        - total: :class:`float` – seconds taken over every move
+        - count: :class:`int` – moves timed
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        """Moves at or under each bucket bound, then all of them, as Prometheus counts them."""
+        counts = []
+        running = 0
+        for count in self.counts:
+            running += count
+            counts.append(running)
+        return counts
+
+
+class Metrics:
+    """
+    Everything measured since enable().
+
+    Attributes
+        - move_latency: :class:`dict[str, Histogram]` – move latencies by player class name
+        - branches: :class:`dict[str, int]` – how often each of Impossible's strategies was used, and
+          'win_or_block' for the moves that took a win or blocked one. A move a case strategy handed to
+          random_move counts as random_move's only, so the branches add up to Impossible's moves
+        - games: :class:`int` – games finished
+        - started: :class:`float` – when measuring started, from time.perf_counter
+        - stopped: :class:`float | None` – when measuring stopped, if it has
+    """
+
+    def __init__(self):
+        self.move_latency = {}
+        self.branches = dict.fromkeys(('win_or_block',) + IMPOSSIBLE_BRANCHES, 0)
+        self.games = 0
+        self.started = time.perf_counter()
+        self.stopped = None
+
+    def observe_move(self, player_type: str, seconds: float):
+        histogram = self.move_latency.get(player_type)
+        if histogram is None:
+            histogram = self.move_latency[player_type] = Histogram()
+        histogram.observe(seconds)
+
+    @property
+    def games_per_sec(self) -> float:
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        return self.games / elapsed if elapsed else 0.0
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'games': self.games,
+            'games_per_sec': self.games_per_sec,
+            'move_latency': {name: {'buckets': dict(zip(map(str, BUCKETS), histogram.counts)),
+                                    'over': histogram.counts[-1],
+                                    'sum': histogram.total,
+                                    'count': histogram.count}
+                             for name, histogram in self.move_latency.items()},
+            'impossible_branches': self.branches,
+        }, indent=2)
+
+    def to_prometheus(self) -> str:
+        """The metrics in Prometheus' text exposition format."""
+        lines = ['# HELP tictactoe_move_seconds Time taken to choose a move.',
+                 '# TYPE tictactoe_move_seconds histogram']
+        for name, histogram in self.move_latency.items():
+            for bound, count in zip(BUCKETS + ('+Inf',), histogram.cumulative()):
+                lines.append(f'tictactoe_move_seconds_bucket{{player="{name}",le="{bound}"}} {count}')
+            lines.append(f'tictactoe_move_seconds_sum{{player="{name}"}} {histogram.total}')
+            lines.append(f'tictactoe_move_seconds_count{{player="{name}"}} {histogram.count}')
+        lines += ['# HELP tictactoe_games_total Games finished.',
+                  '# TYPE tictactoe_games_total counter',
+                  f'tictactoe_games_total {self.games}',
+                  '# HELP tictactoe_impossible_branch_total Moves chosen by each of Impossible\'s strategies.',
+                  '# TYPE tictactoe_impossible_branch_total counter']
+        for branch, count in self.branches.items():
+            lines.append(f'tictactoe_impossible_branch_total{{branch="{branch}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = None
+#(class, attribute, what was in the class's own __dict__ or None) for everything enable() replaced
+patched = []
+#whether this thread is already timing a move, so a player that calls another player's move is timed once
+timing = threading.local()
+#whether a strategy this thread called has already counted the move it chose
+branching = threading.local()
+
+
+def player_classes(cls: type = Player) -> list[type]:
+    classes = []
+    for subclass in cls.__subclasses__():
+        classes.append(subclass)
+        classes += player_classes(subclass)
+    return classes
+
+
+def patch(cls: type, name: str, wrapper):
+    patched.append((cls, name, cls.__dict__.get(name)))
+    setattr(cls, name, wrapper)
+
+
+def timed_move(move):
+    def wrapper(self, board):
+        if getattr(timing, 'active', False):
+            return move(self, board)
+        timing.active = True
+        start = time.perf_counter()
+        try:
+            return move(self, board)
+        finally:
+            timing.active = False
+            metrics.observe_move(type(self).__name__, time.perf_counter() - start)
+    return wrapper
+
+
+def counted_branch(branch: str, method):
+    #the innermost strategy that chose the move counts it, not the case that fell back to it
+    def wrapper(self, board):
+        branching.counted = False
+        move = method(self, board)
+        if not branching.counted:
+            metrics.branches[branch] += 1
+            branching.counted = True
+        return move
+    return wrapper
+
+
+def counted_win_or_block(method):
+    def wrapper(self, board):
+        move = method(self, board)
+        if move is not None:
+            metrics.branches['win_or_block'] += 1
+        return move
+    return wrapper
+
+
+def counted_make_move(make_move):
+    #every way of playing a game, step() and play() or events(), makes its moves through make_move
+    def wrapper(self, move):
+        made = make_move(self, move)
+        if made and self.finished:
+            metrics.games += 1
+        return made
+    return wrapper
+
+
+def enable() -> Metrics:
+    """Start measuring, and return the Metrics everything is recorded in."""
+    global metrics
+    if metrics is not None:
+        return metrics
+    metrics = Metrics()
+    for cls in player_classes():
+        if 'move' in cls.__dict__:
+            patch(cls, 'move', timed_move(cls.__dict__['move']))
+    for branch in IMPOSSIBLE_BRANCHES:
+        patch(Impossible, branch, counted_branch(branch, getattr(Impossible, branch)))
+    patch(Impossible, 'try_win_or_block', counted_win_or_block(Impossible.try_win_or_block))
+    patch(Match, 'make_move', counted_make_move(Match.make_move))
+    return metrics
+
+
+def disable() -> Metrics | None:
+    """Stop measuring and put everything back as it was. Returns what was measured."""
+    global metrics
+    for cls, name, original in reversed(patched):
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    patched.clear()
+    measured, metrics = metrics, None
+    if measured is not None:
+        measured.stopped = time.perf_counter()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play games with instrumentation on and print the metrics.")
+    parser.add_argument('player1', type=load_player)
+    parser.add_argument('player2', type=load_player)
+    parser.add_argument('--second', action='store_true', help='player 1 goes second')
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('--format', choices=('json', 'prometheus'), default='prometheus')
+    args = parser.parse_args()
+
+    enable()
+    play_games(args.player1, args.player2, not args.second, args.games)
+    measured = disable()
+    if args.format == 'json':
+        print(measured.to_json())
+    else:
+        print(measured.to_prometheus(), end='')
+
+
+if __name__ == '__main__':
+    main()
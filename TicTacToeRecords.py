@@ -0,0 +1,186 @@
+"""
+A compact binary file of finished 3x3 games.
+
+After an 8 byte header every game is one little-endian 64-bit record:
+
+    bits  0-35  the moves, 4 bits each, first move in the lowest bits
+    bits 36-39  how many moves there were
+    bit     40  whether player 1 went first
+    bits 41-43  player 1's type, an index into PLAYER_TYPES
+    bits 44-46  player 2's type
+    bits 47-48  the result: 0 tie, 1 player 1 won, 2 player 2 won
+
+RecordWriter appends records through a buffer, and GameRecords memory-maps a
+file and reads the records in place.
+"""
+from array import array
+import mmap
+import os
+import sys
+
+MAGIC = b'TTTR\x01\x00\x00\x00'
+RECORD_SIZE = 8
+# player types by class name, anything else is stored as 'Other'
+PLAYER_TYPES = ('Other', 'Human', 'Random', 'RandomNotStupid', 'Impossible', 'Perfect', 'Search', 'Remote')
+TIE, PLAYER1_WON, PLAYER2_WON = 0, 1, 2
+
+
+def pack_record(moves: list[int], player1_first: bool, player1_type: str, player2_type: str, result: int) -> int:
+    """
+    Pack one game into a record.
+
+    :param moves: every move of the game, in order
+    :param player1_first: whether player 1 went first
+    :param player1_type: player 1's class name
+    :param player2_type: player 2's class name
+    :param result: TIE, PLAYER1_WON or PLAYER2_WON
+    """
+    if len(moves) > 9 or any(not 0 <= move < 9 for move in moves):
+        raise ValueError("Only games on a 3x3 board can be recorded")
+    record = 0
+    for i, move in enumerate(moves):
+        record |= move << (4 * i)
+    record |= len(moves) << 36
+    record |= int(player1_first) << 40
+    record |= player_type_id(player1_type) << 41
+    record |= player_type_id(player2_type) << 44
+    record |= result << 47
+    return record
+
+
+def player_type_id(name: str) -> int:
+    return PLAYER_TYPES.index(name) if name in PLAYER_TYPES else 0
+
+
+def record_moves(record: int) -> list[int]:
+    return [record >> (4 * i) & 0xF for i in range(record >> 36 & 0xF)]
+
+
+def record_player1_first(record: int) -> bool:
+    return bool(record >> 40 & 1)
+
+
+def record_player_types(record: int) -> tuple[str, str]:
+    return PLAYER_TYPES[record >> 41 & 0b111], PLAYER_TYPES[record >> 44 & 0b111]
+
+
+def record_result(record: int) -> int:
+    return record >> 47 & 0b11
+
+
+class RecordWriter:
+    """
+    Appends games to a record file, a buffer's worth at a time. Use it as a
+    context manager, or call close() to write what's left in the buffer.
+
+    Attributes
+        - path: :class:`str` – the record file
+        - buffer_size: :class:`int` – how many records to hold before writing them out
+        - written: :class:`int` – games written by this writer
+    """
+
+    def __init__(self, path: str, buffer_size: int = 8192):
+        """
+        :param path: the record file, created with a header if it doesn't exist
+        :param buffer_size: how many records to hold before writing them out
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.written = 0
+        self.buffer = bytearray()
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def write(self, moves: list[int], player1_first: bool, player1_type: str, player2_type: str, result: int):
+        """Append one game, see pack_record."""
+        self.buffer += pack_record(moves, player1_first, player1_type, player2_type, result).to_bytes(
+            RECORD_SIZE, 'little')
+        self.written += 1
+        if len(self.buffer) >= self.buffer_size * RECORD_SIZE:
+            self.flush()
+
+    def write_match(self, match):
+        """Append a finished Match."""
+        if match.winner is None:
+            result = TIE
+        elif match.winner is match.player1:
+            result = PLAYER1_WON
+        else:
+            result = PLAYER2_WON
+        self.write(match.board.moves, match.player1.has_first_turn, type(match.player1).__name__,
+                   type(match.player2).__name__, result)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecords:
+    """
+    A memory-mapped record file. Iterating it gives the packed records as ints,
+    read straight from the map on little-endian machines and from a byte-swapped
+    copy on big-endian ones; decode them with the record_* functions.
+
+    Attributes
+        - path: :class:`str` – the record file
+        - records: :class:`memoryview` – the records, as unsigned 64-bit ints
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC) or (size - len(MAGIC)) % RECORD_SIZE:
+            self.file.close()
+            raise ValueError(f"{path} isn't a complete record file")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} isn't a record file")
+        if sys.byteorder == 'little':
+            self.records = memoryview(self.map)[len(MAGIC):].cast('Q')
+        else:
+            #the records are little-endian whatever machine wrote them
+            records = array('Q', self.map[len(MAGIC):])
+            records.byteswap()
+            self.records = memoryview(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> int:
+        return self.records[index]
+
+    def counts(self) -> tuple[int, int, int]:
+        """Return (ties, player1 wins, player2 wins) over every game."""
+        counts = [0, 0, 0]
+        for record in self.records:
+            counts[record >> 47 & 0b11] += 1
+        return counts[TIE], counts[PLAYER1_WON], counts[PLAYER2_WON]
+
+    def close(self):
+        if hasattr(self, 'records'):
+            self.records.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
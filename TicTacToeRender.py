@@ -0,0 +1,123 @@
+"""
+Render recorded games to images without opening a window.
+
+    python TicTacToeRender.py games.ttt frames/ --sheet --scale 0.25
+
+writes one PNG per ply of every game, or with --sheet one strip per game with
+every ply side by side, and reports how many frames per second it rendered.
+Record files come from --record, see TicTacToeRecords.
+"""
+import argparse
+import os
+import time
+
+import pygame
+
+from TicTacToeGraphics import SCREEN_HEIGHT, SCREEN_WIDTH, end_screen, paint_board, paint_marker
+from TicTacToeRecords import PLAYER1_WON, PLAYER2_WON, GameRecords, record_moves, record_player1_first, \
+    record_result
+from TicTacToeText import Board
+
+# a 3x3 game is at most 9 moves, plus the empty board
+MAX_FRAMES = 10
+
+
+def end_message(result: int) -> str:
+    if result == PLAYER1_WON:
+        return "Player 1 won!!"
+    elif result == PLAYER2_WON:
+        return "Player 2 won!!"
+    return 'It\'s a tie'
+
+
+def render_frames(screen: pygame.Surface, record: int):
+    """
+    Draw a recorded game onto screen one ply at a time, yielding after each one,
+    starting with the empty board. The last frame has the end message on it.
+    Player 1 is X, as in the games the record came from.
+    """
+    board = Board()
+    paint_board(screen, board)
+    yield screen
+    tiles = 'XO' if record_player1_first(record) else 'OX'
+    moves = record_moves(record)
+    for ply, move in enumerate(moves):
+        paint_marker(screen, tiles[ply % 2], move, board)
+        if ply == len(moves) - 1:
+            end_screen(screen, end_message(record_result(record)))
+        yield screen
+
+
+class Renderer:
+    """
+    Renders games into surfaces it allocates once and reuses for every game.
+
+    Attributes
+        - out_dir: :class:`str` – where the images go
+        - sheet: :class:`bool` – whether to write one sprite sheet per game instead of a file per frame
+        - frame_size: :class:`tuple[int, int]` – the size of each saved frame
+        - frames: :class:`int` – frames rendered so far
+        - games: :class:`int` – games rendered so far
+    """
+
+    def __init__(self, out_dir: str, sheet: bool = False, scale: float = 1.0):
+        """
+        :param out_dir: where the images go, created if it doesn't exist
+        :param sheet: write one sprite sheet per game instead of a file per frame
+        :param scale: how much to scale the window-sized frames by
+        """
+        self.out_dir = out_dir
+        self.sheet = sheet
+        self.frame_size = (max(1, round(SCREEN_WIDTH * scale)), max(1, round(SCREEN_HEIGHT * scale)))
+        self.frames = 0
+        self.games = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.thumbnail = pygame.Surface(self.frame_size) if scale != 1.0 else None
+        self.sprites = pygame.Surface((self.frame_size[0] * MAX_FRAMES, self.frame_size[1])) if sheet else None
+
+    def render(self, index: int, record: int):
+        """Render one game, naming its files after index."""
+        width, height = self.frame_size
+        count = 0
+        for ply, screen in enumerate(render_frames(self.screen, record)):
+            frame = screen
+            if self.thumbnail is not None:
+                frame = pygame.transform.smoothscale(screen, self.frame_size, self.thumbnail)
+            if self.sprites is not None:
+                self.sprites.blit(frame, (ply * width, 0))
+            else:
+                pygame.image.save(frame, os.path.join(self.out_dir, f"game{index:06d}_{ply}.png"))
+            count += 1
+        if self.sprites is not None:
+            pygame.image.save(self.sprites.subsurface((0, 0, count * width, height)),
+                              os.path.join(self.out_dir, f"game{index:06d}.png"))
+        self.frames += count
+        self.games += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render recorded games to PNG frames or sprite sheets.")
+    parser.add_argument('records', help='a record file')
+    parser.add_argument('out_dir', help='where to write the images')
+    parser.add_argument('--sheet', action='store_true', help='write one sprite sheet per game')
+    parser.add_argument('--scale', type=float, default=1.0, help='scale the frames by this much')
+    parser.add_argument('--limit', type=int, help='render only the first LIMIT games')
+    args = parser.parse_args()
+
+    #never open a window, everything is drawn on offscreen surfaces
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    renderer = Renderer(args.out_dir, args.sheet, args.scale)
+    start = time.perf_counter()
+    with GameRecords(args.records) as records:
+        for index, record in enumerate(records):
+            if args.limit is not None and index >= args.limit:
+                break
+            renderer.render(index, record)
+    elapsed = time.perf_counter() - start
+    rate = renderer.frames / elapsed if elapsed else 0.0
+    print(f"{renderer.games} games, {renderer.frames} frames in {elapsed:.2f}s ({rate:,.0f} frames/sec)")
+
+
+if __name__ == '__main__':
+    main()
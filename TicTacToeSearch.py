@@ -0,0 +1,330 @@
+"""
+A general search AI for any m,n,k board: negamax with alpha-beta pruning,
+iterative deepening under a per-move time budget, and a Zobrist-hashed
+transposition table.
+
+    python TicTacToeSearch.py --width 15 --height 15 -k 5 --time 1 --table-bits 20
+
+plays two search players against each other and prints nodes/sec and the
+table hit rate for every move, to help size the table.
+"""
+import argparse
+from functools import lru_cache
+import random
+import time
+
+from TicTacToeText import Board, Match, Player, check_if_losing, mask_squares
+
+# scores are from the side to move's point of view, a win is WIN minus the plies it takes
+WIN = 1 << 20
+# transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget for a move runs out."""
+
+
+@lru_cache
+def zobrist_keys(size: int) -> tuple[list[int], list[int]]:
+    """Random 64-bit keys for each side on each square, the same every run."""
+    rng = random.Random(size)
+    return [rng.getrandbits(64) for _ in range(size)], [rng.getrandbits(64) for _ in range(size)]
+
+
+@lru_cache
+def line_weights(k: int) -> list[int]:
+    """
+    How much an open line is worth for each number of stones in it, up to k.
+    Each stone is worth 8 times the last, up to 7 stones, so scores stay well
+    under WIN.
+    """
+    return [0] + [8 ** min(stones - 1, 6) for stones in range(1, k + 1)]
+
+
+@lru_cache
+def neighbourhoods(width: int, height: int, radius: int = 2) -> list[int]:
+    """For each square, a mask of the squares within radius of it."""
+    masks = []
+    for square in range(width * height):
+        x, y = square % width, square // width
+        mask = 0
+        for ny in range(max(0, y - radius), min(height, y + radius + 1)):
+            for nx in range(max(0, x - radius), min(width, x + radius + 1)):
+                mask |= 1 << (nx + ny * width)
+        masks.append(mask)
+    return masks
+
+
+class TranspositionTable:
+    """
+    A fixed-size transposition table indexed by the low bits of a Zobrist hash.
+
+    When two positions share a slot the new one replaces the old if it was
+    searched at least as deep, or if the old one was stored while searching an
+    earlier move.
+
+    Attributes
+        - size: :class:`int` – number of slots
+        - entries: :class:`list` – (key, depth, value, bound, move, age) per slot, or None
+        - age: :class:`int` – the number of the current search
+        - probes: :class:`int` – lookups this search
+        - hits: :class:`int` – lookups that found the position this search
+        - overwrites: :class:`int` – entries evicted for a different position this search
+    """
+
+    def __init__(self, bits: int = 16):
+        """:param bits: the table has 2**bits slots"""
+        self.size = 1 << bits
+        self.entries = [None] * self.size
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Start a new search, so older entries are the first to be replaced."""
+        self.age += 1
+        self.probes = 0
+        self.hits = 0
+        self.overwrites = 0
+
+    def probe(self, key: int):
+        """Return the entry for a position, or None."""
+        self.probes += 1
+        entry = self.entries[key & (self.size - 1)]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, value: int, bound: int, move: int | None):
+        index = key & (self.size - 1)
+        entry = self.entries[index]
+        if entry is not None:
+            if entry[0] != key and entry[1] > depth and entry[5] == self.age:
+                return
+            if entry[0] != key:
+                self.overwrites += 1
+        self.entries[index] = (key, depth, value, bound, move, self.age)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    @property
+    def fill(self) -> float:
+        """The fraction of slots in use."""
+        return (self.size - self.entries.count(None)) / self.size
+
+
+class Search(Player):
+    """
+    An AI player that searches the game tree, for any size of board.
+
+    Attributes
+        - tile_type: :class:`str` – which marker this player puts down
+        - name: :class:`str` – the name of this player
+        - time_limit: :class:`float` – seconds to spend on each move
+        - max_depth: :class:`int | None` – the deepest search to try, unlimited if None
+        - table: :class:`TranspositionTable` – positions already searched
+        - nodes: :class:`int` – positions visited in the last move
+        - elapsed: :class:`float` – seconds the last move took
+        - depth: :class:`int` – the deepest search the last move finished
+    """
+
+    def __init__(self, tile_type, name, time_limit: float = 1.0, max_depth: int | None = None,
+                 table_bits: int = 16):
+        """
+        :param time_limit: seconds to spend on each move
+        :param max_depth: the deepest search to try, unlimited if None
+        :param table_bits: the transposition table has 2**table_bits slots
+        """
+        super().__init__(tile_type, name)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = TranspositionTable(table_bits)
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.depth = 0
+        self.deadline = 0.0
+        self.root_move = None
+        self.board = None
+        self.keys = None
+
+    def move(self, board: Board) -> int:
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit
+        self.board = board
+        self.keys = zobrist_keys(board.size)
+        self.table.new_search()
+        self.nodes = 0
+        self.depth = 0
+
+        turn = board.turn
+        mine, theirs = board.masks[turn], board.masks[turn ^ 1]
+        key = 0
+        for side, mask in enumerate(board.masks):
+            for square in mask_squares(mask):
+                key ^= self.keys[side][square]
+        best_move = self.order_moves(mine, theirs, board.available, None)[0]
+        max_depth = board.available.bit_count()
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+        for depth in range(1, max_depth + 1):
+            try:
+                value = self.negamax(mine, theirs, board.available, key, turn, depth, -WIN - 1, WIN + 1, 0)
+            except SearchTimeout:
+                break
+            best_move = self.root_move
+            self.depth = depth
+            #a forced win or loss has been found, searching deeper won't change it
+            if abs(value) > WIN - board.size:
+                break
+        self.elapsed = time.perf_counter() - start
+        return best_move
+
+    def report(self) -> str:
+        """Describe the last move's search."""
+        rate = self.nodes / self.elapsed if self.elapsed else 0.0
+        return (f"depth {self.depth}, {self.nodes} nodes in {self.elapsed:.3f}s ({rate:,.0f} nodes/sec), "
+                f"table hit rate {self.table.hit_rate:.1%}, fill {self.table.fill:.1%}, "
+                f"{self.table.overwrites} overwrites")
+
+    def negamax(self, mine: int, theirs: int, available: int, key: int, side: int,
+                depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Return the value of a position for the side to move, which holds mine."""
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        lines = self.board.lines
+        win = check_if_losing(available, mine, lines)
+        if win is not None:
+            if ply == 0:
+                self.root_move = win
+            return WIN - ply - 1
+        if not available:
+            return 0
+        if depth == 0:
+            return self.evaluate(mine, theirs)
+
+        original_alpha = alpha
+        table_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                value = entry[2]
+                #win scores are stored relative to the position
+                if value > WIN - self.board.size:
+                    value -= ply
+                elif value < -WIN + self.board.size:
+                    value += ply
+                if entry[3] == EXACT:
+                    return value
+                elif entry[3] == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        block = check_if_losing(available, theirs, lines)
+        if block is not None:
+            moves = [block]
+        else:
+            moves = self.order_moves(mine, theirs, available, table_move)
+
+        best_value = -WIN - 1
+        best_move = moves[0]
+        keys = self.keys[side]
+        for move in moves:
+            bit = 1 << move
+            value = -self.negamax(theirs, mine | bit, available ^ bit, key ^ keys[move], side ^ 1,
+                                  depth - 1, -beta, -alpha, ply + 1)
+            if value > best_value:
+                best_value = value
+                best_move = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if ply == 0:
+            self.root_move = best_move
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        stored = best_value
+        if stored > WIN - self.board.size:
+            stored += ply
+        elif stored < -WIN + self.board.size:
+            stored -= ply
+        self.table.store(key, depth, stored, bound, best_move)
+        return best_value
+
+    def order_moves(self, mine: int, theirs: int, available: int, first: int | None) -> list[int]:
+        """
+        Return the squares worth searching, near the stones already down, best first:
+        the table's move, then the squares that build or break up the most open lines.
+        """
+        board = self.board
+        occupied = mine | theirs
+        if not occupied:
+            return [board.width // 2 + board.height // 2 * board.width]
+        near = 0
+        around = neighbourhoods(board.width, board.height)
+        for square in mask_squares(occupied):
+            near |= around[square]
+        #if every square near the stones is taken, any square will do
+        candidates = mask_squares(near & available) or mask_squares(available)
+        weights = line_weights(board.k)
+        scores = {}
+        for square in candidates:
+            score = 0
+            for line in board.lines_through[square]:
+                if not line & theirs:
+                    score += weights[(line & mine).bit_count()]
+                if not line & mine:
+                    score += weights[(line & theirs).bit_count()]
+            scores[square] = score
+        if first is not None and first in scores:
+            scores[first] = WIN
+        return sorted(candidates, key=scores.__getitem__, reverse=True)
+
+    def evaluate(self, mine: int, theirs: int) -> int:
+        """Score the open lines each side could still complete."""
+        weights = line_weights(self.board.k)
+        score = 0
+        for line in self.board.lines:
+            if not line & theirs:
+                score += weights[(line & mine).bit_count()]
+            elif not line & mine:
+                score -= weights[(line & theirs).bit_count()]
+        return score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play two search players against each other and "
+                                                 "report the search statistics for each move.")
+    parser.add_argument('--width', type=int, default=3, help='number of columns')
+    parser.add_argument('--height', type=int, default=3, help='number of rows')
+    parser.add_argument('-k', type=int, default=3, help='how many in a row wins')
+    parser.add_argument('--time', type=float, default=1.0, help='seconds per move')
+    parser.add_argument('--table-bits', type=int, default=16, help='the table has 2**bits slots')
+    args = parser.parse_args()
+
+    match = Match(Search('X', 'Search', args.time, table_bits=args.table_bits),
+                  Search('O', 'Search2', args.time, table_bits=args.table_bits),
+                  True, args.width, args.height, args.k)
+    while not match.finished:
+        player = match.curr_player
+        move = match.step()
+        print(f"{player.name} plays {move}: {player.report()}")
+    print(f"{match.winner.name} won!!" if match.winner is not None else "It's a tie")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Host games of tic-tac-toe over TCP, one JSON object per line.
+
+    python TicTacToeServer.py serve --port 8765
+    python TicTacToeServer.py load --port 8765 --clients 200 --games 50 --opponent Impossible
+
+Client messages:
+    {"type": "new", "opponent": "Impossible", "first": true, "width": 3, "height": 3, "k": 3}
+        start a game against an AI (Random, RandomNotStupid, Impossible, Perfect or Search),
+        or against the next client that asks for "human"; everything but opponent is optional
+    {"type": "move", "square": 4}
+
+Server messages:
+    {"type": "waiting"}                                  waiting for another client to pair with
+    {"type": "start", "tile": "X", "first": true, "width": 3, "height": 3, "k": 3}
+    {"type": "turn"}                                     it's your move
+    {"type": "moved", "tile": "O", "square": 4}          a move by either side
+    {"type": "end", "winner": "X", "moves": [4, 0, ...]} winner is null for a tie or abandoned game
+    {"type": "error", "message": "..."}
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from TicTacToeSearch import Search
+from TicTacToeText import Board, Impossible, Match, Perfect, Player, Random, RandomNotStupid, mask_squares
+
+OPPONENTS = {'Random': Random, 'RandomNotStupid': RandomNotStupid, 'Impossible': Impossible,
+             'Perfect': Perfect, 'Search': Search}
+# AIs that answer quickly enough to run on the event loop, the rest run in the default executor
+INLINE_OPPONENTS = (Random, RandomNotStupid, Impossible, Perfect)
+
+
+class Remote(Player):
+    """
+    A player at the other end of a connection. The server hands it each move
+    before asking the Match to step.
+
+    Attributes
+        - tile_type: :class:`str` – which marker this player puts down
+        - name: :class:`str` – the name of this player
+        - connection: :class:`Connection` – where this player's messages come from
+        - next_move: :class:`int | None` – the move it sent
+    """
+
+    def __init__(self, tile_type, name, connection: 'Connection'):
+        super().__init__(tile_type, name)
+        self.connection = connection
+        self.next_move = None
+
+    def move(self, board: Board) -> int:
+        return self.next_move
+
+    def reset(self):
+        super().reset()
+        self.next_move = None
+
+
+class Connection:
+    """
+    One client connection, which plays one game at a time.
+
+    Attributes
+        - writer: :class:`asyncio.StreamWriter` – the connection's output
+        - moves: :class:`asyncio.Queue` – squares the client sent for its current game, None once it's gone
+        - playing: :class:`bool` – whether it is in (or waiting for) a game
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.moves = asyncio.Queue()
+        self.playing = False
+
+    def send(self, message: dict):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b'\n')
+
+
+class Server:
+    """
+    Hosts every game. Each game is one task; each connection has a reader task
+    that feeds its moves into the game.
+
+    Attributes
+        - waiting: :class:`Connection | None` – a client waiting to be paired with another
+        - games_played: :class:`int` – games finished since the server started
+        - games: :class:`set[asyncio.Task]` – the games being played, kept so they aren't garbage collected
+    """
+
+    def __init__(self):
+        self.waiting = None
+        self.games_played = 0
+        self.games = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = Connection(writer)
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                    kind = message['type']
+                except (ValueError, KeyError, TypeError):
+                    connection.send({'type': 'error', 'message': 'expected a JSON object with a type'})
+                    continue
+                if kind == 'new':
+                    self.new_game(connection, message)
+                elif kind == 'move' and connection.playing:
+                    connection.moves.put_nowait(message.get('square'))
+                else:
+                    connection.send({'type': 'error', 'message': f"can't {kind} now"})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if self.waiting is connection:
+                self.waiting = None
+            connection.moves.put_nowait(None)
+            writer.close()
+
+    def new_game(self, connection: Connection, message: dict):
+        if connection.playing:
+            connection.send({'type': 'error', 'message': 'already in a game'})
+            return
+        opponent = message.get('opponent')
+        try:
+            size = (int(message.get('width', 3)), int(message.get('height', 3)), int(message.get('k', 3)))
+            Board(*size)
+        except (TypeError, ValueError) as error:
+            connection.send({'type': 'error', 'message': str(error)})
+            return
+        if opponent in ('Impossible', 'Perfect') and size != (3, 3, 3):
+            connection.send({'type': 'error', 'message': f"{opponent} only plays 3x3"})
+            return
+        connection.playing = True
+        connection.moves = asyncio.Queue()
+        if opponent == 'human':
+            if self.waiting is None:
+                self.waiting = connection
+                connection.send({'type': 'waiting'})
+                return
+            other, self.waiting = self.waiting, None
+            player1 = Remote('X', 'Player 1', other)
+            player2 = Remote('O', 'Player 2', connection)
+            match = Match(player1, player2, True, *size)
+        elif opponent in OPPONENTS:
+            player1 = Remote('X', 'Player 1', connection)
+            player2 = OPPONENTS[opponent]('O', opponent)
+            match = Match(player1, player2, bool(message.get('first', True)), *size)
+        else:
+            connection.playing = False
+            connection.send({'type': 'error', 'message': f"unknown opponent {opponent}"})
+            return
+        game = asyncio.create_task(self.run_game(match, size))
+        self.games.add(game)
+        game.add_done_callback(self.games.discard)
+
+    async def run_game(self, match: Match, size: tuple[int, int, int]):
+        remotes = [player for player in (match.player1, match.player2) if isinstance(player, Remote)]
+        abandoned = False
+        try:
+            for remote in remotes:
+                remote.connection.send({'type': 'start', 'tile': remote.tile_type, 'first': remote.has_first_turn,
+                                        'width': size[0], 'height': size[1], 'k': size[2]})
+            loop = asyncio.get_running_loop()
+            while not match.finished:
+                player = match.curr_player
+                if isinstance(player, Remote):
+                    player.connection.send({'type': 'turn'})
+                    square = await player.connection.moves.get()
+                    if square is None:
+                        abandoned = True
+                        break
+                    #anything but a square on the board is turned away before it reaches the board
+                    valid = isinstance(square, int) and 0 <= square < match.board.size
+                    player.next_move = square if valid else -1
+                    move = match.step()
+                    if move is None:
+                        player.connection.send({'type': 'error', 'message': f"{square} isn't an available square"})
+                        continue
+                elif isinstance(player, INLINE_OPPONENTS):
+                    move = match.step()
+                else:
+                    move = await loop.run_in_executor(None, match.step)
+                for remote in remotes:
+                    remote.connection.send({'type': 'moved', 'tile': player.tile_type, 'square': move})
+        except Exception:
+            #a game that goes wrong ends as abandoned, so neither client is left waiting
+            abandoned = True
+            raise
+        finally:
+            winner = match.winner.tile_type if match.winner is not None and not abandoned else None
+            for remote in remotes:
+                remote.connection.playing = False
+                remote.connection.send({'type': 'end', 'winner': winner, 'moves': match.board.moves})
+            self.games_played += 1
+
+
+async def serve(host: str, port: int):
+    server = Server()
+    listener = await asyncio.start_server(server.handle, host, port, limit=1 << 16)
+    print(f"serving on {', '.join(str(sock.getsockname()) for sock in listener.sockets)}")
+    async with listener:
+        await listener.serve_forever()
+
+
+async def load_client(host: str, port: int, games: int, opponent: str, latencies: list[float]):
+    """Play games against the server with random moves, recording how long each move takes to answer."""
+    reader, writer = await asyncio.open_connection(host, port)
+    for game in range(games):
+        writer.write(json.dumps({'type': 'new', 'opponent': opponent, 'first': game % 2 == 0}).encode() + b'\n')
+        available = (1 << 9) - 1
+        sent = None
+        while True:
+            message = json.loads(await reader.readline())
+            kind = message['type']
+            if kind == 'moved':
+                available &= ~(1 << message['square'])
+            elif kind == 'turn':
+                if sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+                square = random.choice(mask_squares(available))
+                sent = time.perf_counter()
+                writer.write(json.dumps({'type': 'move', 'square': square}).encode() + b'\n')
+            elif kind == 'end':
+                if sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+                break
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load(host: str, port: int, clients: int, games: int, opponent: str, local: bool):
+    listener = None
+    if local:
+        listener = await asyncio.start_server(Server().handle, host, port)
+        port = listener.sockets[0].getsockname()[1]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(load_client(host, port, games, opponent, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    if listener is not None:
+        listener.close()
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{clients * games} games in {elapsed:.2f}s ({clients * games / elapsed:,.0f} games/sec) "
+          f"over {clients} connections")
+    print(f"move latency: p50 {p50:.2f}ms, p99 {p99:.2f}ms ({len(latencies)} moves)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host tic-tac-toe games over TCP, or load test a server.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run the server')
+    load_parser = commands.add_parser('load', help='play lots of games against a server at once')
+    for command in (serve_parser, load_parser):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8765)
+    load_parser.add_argument('--clients', type=int, default=100, help='concurrent connections')
+    load_parser.add_argument('--games', type=int, default=20, help='games per connection')
+    load_parser.add_argument('--opponent', default='Impossible', choices=sorted(OPPONENTS))
+    load_parser.add_argument('--local', action='store_true',
+                             help='run the server in this process on a free port instead of connecting')
+    args = parser.parse_args()
+    if args.command == 'serve':
+        asyncio.run(serve(args.host, args.port))
+    else:
+        asyncio.run(load(args.host, 0 if args.local else args.port, args.clients, args.games, args.opponent,
+                         args.local))
+
+
+if __name__ == '__main__':
+    main()
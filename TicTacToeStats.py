@@ -0,0 +1,156 @@
+"""
+Play a matchup until the chance of each result is known well enough, instead
+of a fixed number of games.
+
+    python TicTacToeStats.py Random Impossible --precision 0.001 --confidence 0.99
+
+plays games in chunks and stops once every result's confidence interval
+(Wilson by default, or Clopper-Pearson) is within the precision either side.
+"""
+import argparse
+import math
+from statistics import NormalDist
+import time
+
+from TicTacToeText import Player, play_games
+from TicTacToeTournament import load_player
+
+OUTCOMES = ('ties', 'Player1 wins', 'Player2 wins')
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """The Wilson score interval for a proportion."""
+    if not trials:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+def beta_fraction(a: float, b: float, x: float) -> float:
+    """The continued fraction for the incomplete beta function, evaluated with Lentz's method."""
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 1000):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1) < 1e-15:
+            break
+    return result
+
+
+def beta_cdf(x: float, a: float, b: float) -> float:
+    """The regularized incomplete beta function, the CDF of Beta(a, b) at x."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return front * beta_fraction(a, b, x) / a
+    return 1 - front * beta_fraction(b, a, 1 - x) / b
+
+
+def beta_quantile(q: float, a: float, b: float) -> float:
+    low, high = 0.0, 1.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if beta_cdf(middle, a, b) < q:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def clopper_pearson_interval(successes: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """The exact (Clopper-Pearson) interval for a proportion."""
+    if not trials:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    low = beta_quantile(alpha / 2, successes, trials - successes + 1) if successes else 0.0
+    high = beta_quantile(1 - alpha / 2, successes + 1, trials - successes) if successes < trials else 1.0
+    return low, high
+
+
+INTERVALS = {'wilson': wilson_interval, 'clopper-pearson': clopper_pearson_interval}
+
+
+def play_until(player1_type: type[Player], player2_type: type[Player], player1_first: bool = True,
+               precision: float = 0.001, confidence: float = 0.95, method: str = 'wilson', chunk: int = 1000,
+               max_games: int | None = None, width: int = 3, height: int = 3,
+               k: int = 3) -> tuple[tuple[int, int, int], list[tuple[float, float]]]:
+    """
+    Play games a chunk at a time until every result's interval is within
+    precision of its estimate, or max_games have been played.
+
+    :param precision: the widest an interval can be either side of the estimate
+    :param confidence: the confidence level of the intervals
+    :param method: 'wilson' or 'clopper-pearson'
+    :param chunk: how many games to play between checks
+    :param max_games: stop here even if the intervals are still too wide
+    :param width: number of columns
+    :param height: number of rows
+    :param k: how many in a row wins
+    :returns: (ties, player1 wins, player2 wins) and the interval for each
+    """
+    interval = INTERVALS[method]
+    counts = [0, 0, 0]
+    while True:
+        games = sum(counts)
+        if max_games is not None:
+            if games >= max_games:
+                break
+            size = min(chunk, max_games - games)
+        else:
+            size = chunk
+        for i, count in enumerate(play_games(player1_type, player2_type, player1_first, size, None,
+                                             width, height, k)):
+            counts[i] += count
+        games += size
+        intervals = [interval(count, games, confidence) for count in counts]
+        if all(high - count / games <= precision and count / games - low <= precision
+               for count, (low, high) in zip(counts, intervals)):
+            break
+    return tuple(counts), [interval(count, sum(counts), confidence) for count in counts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a matchup until the chance of each result is known "
+                                                 "to within a precision.")
+    parser.add_argument('player1', type=load_player, help="a class in TicTacToeText, or 'module:Class'")
+    parser.add_argument('player2', type=load_player)
+    parser.add_argument('--second', action='store_true', help='player 1 goes second')
+    parser.add_argument('--precision', type=float, default=0.001,
+                        help='how far either side of the estimate the intervals can reach')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--method', choices=sorted(INTERVALS), default='wilson')
+    parser.add_argument('--chunk', type=int, default=1000, help='games between checks')
+    parser.add_argument('--max-games', type=int, help='give up after this many games')
+    parser.add_argument('--width', type=int, default=3, help='number of columns')
+    parser.add_argument('--height', type=int, default=3, help='number of rows')
+    parser.add_argument('-k', type=int, default=3, help='how many in a row wins')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts, intervals = play_until(args.player1, args.player2, not args.second, args.precision, args.confidence,
+                                   args.method, args.chunk, args.max_games, args.width, args.height, args.k)
+    elapsed = time.perf_counter() - start
+    games = sum(counts)
+    print(f"{games} games in {elapsed:.2f}s")
+    for name, count, (low, high) in zip(OUTCOMES, counts, intervals):
+        print(f"{name}: {count} ({count / games:.4f}, {args.confidence:.0%} interval {low:.4f}-{high:.4f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Cache a deterministic player's moves by position, counting rotations and
+reflections of a position as the same one.
+
+    python TicTacToeSymmetry.py TicTacToeSearch:Search Random --games 2000
+
+plays the games with and without the cache and prints the hit rate and times.
+"""
+import argparse
+from collections import OrderedDict
+import copyreg
+from functools import lru_cache
+import time
+
+from TicTacToeText import Board, Player, play_games
+from TicTacToeTournament import load_player
+
+
+@lru_cache
+def symmetries(width: int, height: int) -> list[tuple[int, ...]]:
+    """
+    Every rotation and reflection of the board, as where each square goes. A
+    square board has 8 and any other has 4. The identity is first.
+    """
+    def square(x, y):
+        return x + y * width
+
+    transforms = [lambda x, y: (x, y), lambda x, y: (width - 1 - x, y),
+                  lambda x, y: (x, height - 1 - y), lambda x, y: (width - 1 - x, height - 1 - y)]
+    if width == height:
+        transforms += [lambda x, y: (y, x), lambda x, y: (width - 1 - y, x),
+                       lambda x, y: (y, width - 1 - x), lambda x, y: (width - 1 - y, width - 1 - x)]
+    return [tuple(square(*transform(s % width, s // width)) for s in range(width * height))
+            for transform in transforms]
+
+
+@lru_cache
+def mask_tables(width: int, height: int) -> list[list[list[int]]]:
+    """For each symmetry, tables mapping each byte of a mask to where its squares go."""
+    tables = []
+    for permutation in symmetries(width, height):
+        byte_tables = []
+        for start in range(0, width * height, 8):
+            table = []
+            for byte in range(256):
+                mask = 0
+                for bit in range(8):
+                    if byte >> bit & 1 and start + bit < width * height:
+                        mask |= 1 << permutation[start + bit]
+                table.append(mask)
+            byte_tables.append(table)
+        tables.append(byte_tables)
+    return tables
+
+
+def transform(mask: int, byte_tables: list[list[int]]) -> int:
+    result = 0
+    for table in byte_tables:
+        result |= table[mask & 255]
+        mask >>= 8
+    return result
+
+
+class MoveCache:
+    """
+    A bounded least-recently-used cache of moves by canonical position.
+
+    Attributes
+        - maxsize: :class:`int` – the most positions to keep
+        - moves: :class:`OrderedDict` – canonical move by canonical position, least recently used first
+        - hits: :class:`int` – lookups that found the position
+        - misses: :class:`int` – lookups that didn't
+        - evictions: :class:`int` – positions dropped to make room
+    """
+
+    def __init__(self, maxsize: int = 1 << 16):
+        self.maxsize = maxsize
+        self.moves = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> int | None:
+        move = self.moves.get(key)
+        if move is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.moves.move_to_end(key)
+        return move
+
+    def put(self, key, move: int):
+        self.moves[key] = move
+        if len(self.moves) > self.maxsize:
+            self.moves.popitem(last=False)
+            self.evictions += 1
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"{self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), {self.evictions} evictions, "
+                f"{len(self.moves)} positions")
+
+
+class Symmetric(Player):
+    """
+    Wraps a player so each position it's asked about, up to rotation and
+    reflection, is only worked out once. The wrapped player has to choose its
+    moves from the position alone, always choosing the same one. A random
+    player would keep the first move it chose in each position.
+
+    Attributes
+        - tile_type: :class:`str` – which marker this player puts down
+        - name: :class:`str` – the name of this player
+        - player: :class:`Player` – the player that works out the moves
+        - cache: :class:`MoveCache` – the moves already worked out, which can be shared between players that
+          play the same way
+    """
+
+    def __init__(self, player: Player, cache: MoveCache | None = None):
+        if player.remembers:
+            raise ValueError(f"{type(player).__name__} remembers the moves before the position, "
+                             f"so it can't be cached by position")
+        super().__init__(player.tile_type, player.name)
+        self.player = player
+        self.cache = cache if cache is not None else MoveCache()
+
+    def move(self, board: Board) -> int:
+        first, second = board.masks
+        best = None
+        best_symmetry = 0
+        for i, byte_tables in enumerate(mask_tables(board.width, board.height)):
+            position = (transform(first, byte_tables), transform(second, byte_tables))
+            if best is None or position < best:
+                best = position
+                best_symmetry = i
+        key = (board.width, board.height, board.k) + best
+        permutation = symmetries(board.width, board.height)[best_symmetry]
+        move = self.cache.get(key)
+        if move is not None:
+            return permutation.index(move)
+        self.player.has_first_turn = self.has_first_turn
+        move = self.player.move(board)
+        self.cache.put(key, permutation[move])
+        return move
+
+    def reset(self):
+        super().reset()
+        self.player.reset()
+
+
+class CachedType(type):
+    """
+    The type of the classes cached() makes. They're pickled as the call to
+    cached() that made them, so they can be sent to other processes, like the
+    tournament's workers, where each process gets a cache of its own.
+    """
+
+
+def cached(player_type: type[Player], maxsize: int = 1 << 16) -> type[Player]:
+    """
+    Return a Player class that plays like player_type through one cache shared
+    by every instance, for anything that makes its own players, like play_games
+    and the tournament. The same arguments give back the same class.
+    """
+    return cached_class(player_type, maxsize)
+
+
+@lru_cache
+def cached_class(player_type: type[Player], maxsize: int) -> type[Player]:
+    cache = MoveCache(maxsize)
+
+    class Cached(Symmetric, metaclass=CachedType):
+        def __init__(self, tile_type, name):
+            super().__init__(player_type(tile_type, name), cache)
+
+    Cached.__name__ = Cached.__qualname__ = f"Cached{player_type.__name__}"
+    Cached.cache = cache
+    Cached.player_type = player_type
+    return Cached
+
+
+copyreg.pickle(CachedType, lambda cls: (cached_class, (cls.player_type, cls.cache.maxsize)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play games with and without a player's moves cached, and "
+                                                 "report the cache's hit rate.")
+    parser.add_argument('player1', type=load_player, help='the player to cache')
+    parser.add_argument('player2', type=load_player)
+    parser.add_argument('-n', '--games', type=int, default=2000)
+    parser.add_argument('--maxsize', type=int, default=1 << 16, help='the most positions to cache')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    play_games(args.player1, args.player2, True, args.games)
+    uncached = time.perf_counter() - start
+    player_type = cached(args.player1, args.maxsize)
+    start = time.perf_counter()
+    play_games(player_type, args.player2, True, args.games)
+    elapsed = time.perf_counter() - start
+    print(f"uncached: {uncached:.2f}s, cached: {elapsed:.2f}s")
+    print(player_type.cache.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,233 @@
 from abc import abstractmethod
+import argparse
+from functools import lru_cache
 import random
+from typing import Iterator, NamedTuple
 
+from TicTacToeEvents import (ConsoleRenderer, Event, GameStart, Move, RecordSink, Rejected, Sink, StatsCounter,
+                             Tie, Undone, Win, board_text, run)
+from TicTacToeRecords import RecordWriter
 
-lines = [{0, 1, 2}, {3, 4, 5}, {6, 7, 8},
-         {0, 3, 6}, {1, 4, 7}, {2, 5, 8},
-         {0, 4, 8}, {2, 4, 6}]
+
+# the four directions a line can run in, as (dx, dy): across, down, and both diagonals
+directions = ((1, 0), (0, 1), (1, 1), (-1, 1))
+
+
+@lru_cache
+def board_lines(width: int, height: int, k: int) -> tuple[list[int], list[list[int]], list[list[int]]]:
+    """
+    Return every k-in-a-row line on a width x height board as a bitmask, and for
+    each square the lines that run through it, both as bitmasks and as indexes into
+    the list of lines. Square (x, y) is bit x + y * width.
+    """
+    lines = []
+    lines_through = [[] for _ in range(width * height)]
+    line_ids_through = [[] for _ in range(width * height)]
+    for dx, dy in directions:
+        for y in range(height - (k - 1) * dy):
+            for x in range(width):
+                if 0 <= x + (k - 1) * dx < width:
+                    line = [x + i * dx + (y + i * dy) * width for i in range(k)]
+                    mask = sum(1 << square for square in line)
+                    for square in line:
+                        lines_through[square].append(mask)
+                        line_ids_through[square].append(len(lines))
+                    lines.append(mask)
+    return lines, lines_through, line_ids_through
+
+
+# bitboard constants for the classic 3x3 board - square i is bit (1 << i)
+full_board = 0b111111111
+line_masks, lines_through, _ = board_lines(3, 3, 3)
 
 corners = [0, 2, 6, 8]
+corner_mask = sum(1 << square for square in corners)
+edge_mask = sum(1 << square for square in (1, 3, 5, 7))
+# the two corners beside each edge
+edge_corners = {1: 0b000000101, 3: 0b001000001, 5: 0b100000100, 7: 0b101000000}
+# the squares in every possible 3x3 mask, in ascending order
+squares = [tuple(square for square in range(9) if mask >> square & 1) for mask in range(full_board + 1)]
+# what a human player's move is when they ask to take back their last move
+UNDO = -1
+
+
+def mask_squares(mask: int) -> tuple[int, ...]:
+    """Return the squares in a mask, in ascending order."""
+    if mask <= full_board:
+        return squares[mask]
+    return tuple(square for square in range(mask.bit_length()) if mask >> square & 1)
+
 
+def get_corner(move: int, size: int = 9) -> int:
+    """Return the corner diagonally opposite a corner."""
+    return size - 1 - move
 
-def get_corner(move: int) -> int:
-    if move == 0:
-        return 8
-    elif move == 2:
-        return 6
-    elif move == 6:
-        return 2
-    elif move == 8:
-        return 0
-
-
-def get_opposite(move: int) -> int:
-    if move == 1:
-        return 7
-    elif move == 3:
-        return 5
-    elif move == 5:
-        return 3
-    elif move == 7:
-        return 1
-
-
-def check_if_losing(available: set, other_player_moves: list) -> int | None:
-    for line in lines:
-        if len(line & set(other_player_moves)) >= 2:
-            possible_moves = line & available
-            if len(possible_moves) == 1:
-                return possible_moves.pop()
+
+def get_opposite(move: int, size: int = 9) -> int:
+    """Return the edge square on the opposite side of the board."""
+    return size - 1 - move
+
+
+def completes_line(mask: int, square: int, through: list[list[int]] = lines_through) -> bool:
+    """
+    Return whether a mask holds a full line through the square. Only the lines in the
+    four directions through that square are checked.
+    """
+    for line in through[square]:
+        if mask & line == line:
+            return True
     return False
 
 
+def check_if_losing(available: int, other_player_moves: int, all_lines: list[int] = line_masks) -> int | None:
+    """
+    Return the square that completes a line for the given moves, or None.
+
+    :param available: bitmask of the empty squares
+    :param other_player_moves: bitmask of the squares held by the player to check
+    :param all_lines: every line on the board, defaults to the 3x3 board's
+    """
+    for line in all_lines:
+        gap = line & ~other_player_moves
+        #exactly one square of the line missing and it's still empty
+        if gap & available and gap & (gap - 1) == 0:
+            return gap.bit_length() - 1
+    return None
+
+
+class Board:
+    """
+    A compact m x n tic-tac-toe position (k in a row wins), with each side stored
+    as an integer bitmask. Square (x, y) is bit x + y * width.
+
+    Attributes
+        - width: :class:`int` – number of columns
+        - height: :class:`int` – number of rows
+        - k: :class:`int` – how many in a row wins
+        - size: :class:`int` – number of squares
+        - lines: :class:`list[int]` – every winning line as a bitmask
+        - lines_through: :class:`list[list[int]]` – the winning lines through each square
+        - line_ids_through: :class:`list[list[int]]` – the indexes into lines of the lines through each square
+        - masks: :class:`list[int]` – the squares held by each side, indexed by turn order (0 went first)
+        - available: :class:`int` – bitmask of the empty squares
+        - moves: :class:`list[int]` – every move made so far, in order
+        - counts: :class:`list[list[int]]` – how many of each line's squares each side holds
+        - threats: :class:`list[dict[int, int]]` – for each side, the lines it is one move from
+          completing (and the opponent isn't in), mapped to the empty square that completes them
+    """
+    __slots__ = ('width', 'height', 'k', 'size', 'lines', 'lines_through', 'line_ids_through',
+                 'masks', 'available', 'moves', 'counts', 'threats')
+
+    def __init__(self, width: int = 3, height: int = 3, k: int = 3):
+        """
+        :param width: number of columns
+        :param height: number of rows
+        :param k: how many in a row wins
+        """
+        if not 2 <= k <= max(width, height):
+            raise ValueError(f"Can't get {k} in a row on a {width}x{height} board")
+        self.width = width
+        self.height = height
+        self.k = k
+        self.size = width * height
+        self.lines, self.lines_through, self.line_ids_through = board_lines(width, height, k)
+        self.masks = [0, 0]
+        self.available = (1 << self.size) - 1
+        self.moves = []
+        self.counts = [[0] * len(self.lines), [0] * len(self.lines)]
+        self.threats = [{}, {}]
+
+    def reset(self):
+        """Empty the board, keeping its lists and dicts for the next game."""
+        first_counts, second_counts = self.counts
+        for square in self.moves:
+            for line in self.line_ids_through[square]:
+                first_counts[line] = second_counts[line] = 0
+        self.masks[0] = self.masks[1] = 0
+        self.available = (1 << self.size) - 1
+        self.moves.clear()
+        self.threats[0].clear()
+        self.threats[1].clear()
+
+    @property
+    def turn(self) -> int:
+        """Index into masks of the side to move."""
+        return len(self.moves) & 1
+
+    def place(self, square: int) -> bool:
+        """
+        Put down a marker for the side to move if the square is available, and
+        update the line counts and threats of the lines through it.
+        """
+        if not 0 <= square < self.size:
+            return False
+        bit = 1 << square
+        if not self.available & bit:
+            return False
+        side = len(self.moves) & 1
+        self.available ^= bit
+        self.masks[side] |= bit
+        self.moves.append(square)
+        my_counts = self.counts[side]
+        their_counts = self.counts[side ^ 1]
+        k = self.k
+        for line in self.line_ids_through[square]:
+            count = my_counts[line] + 1
+            my_counts[line] = count
+            if their_counts[line] == 0:
+                if count == k - 1:
+                    self.threats[side][line] = (self.lines[line] & self.available).bit_length() - 1
+                elif count == k:
+                    self.threats[side].pop(line, None)
+            elif count == 1 and their_counts[line] == k - 1:
+                #blocked their line
+                del self.threats[side ^ 1][line]
+        return True
+
+    def unplace(self) -> int:
+        """
+        Take back the last move and return its square, putting the line counts and
+        threats back as they were. Only the lines through that square are touched,
+        so nothing is copied and a search can place and unplace moves in place.
+        """
+        square = self.moves.pop()
+        bit = 1 << square
+        side = len(self.moves) & 1
+        self.available |= bit
+        self.masks[side] ^= bit
+        my_counts = self.counts[side]
+        their_counts = self.counts[side ^ 1]
+        k = self.k
+        for line in self.line_ids_through[square]:
+            count = my_counts[line]
+            my_counts[line] = count - 1
+            if their_counts[line] == 0:
+                if count == k - 1:
+                    del self.threats[side][line]
+                elif count == k:
+                    #the square completed the line, so it's the one that completes it again
+                    self.threats[side][line] = square
+            elif count == 1 and their_counts[line] == k - 1:
+                #unblocked their line
+                self.threats[side ^ 1][line] = square
+        return square
+
+    def threat(self, side: int) -> int | None:
+        """
+        Return the square that completes a line for a side, or None. Gives the same
+        square as check_if_losing without scanning the lines.
+        """
+        threats = self.threats[side]
+        if threats:
+            return threats[min(threats)]
+        return None
+
+    def check_winning_move(self, move: int) -> bool:
+        """Returns whether a move won the game for the side that made it."""
+        mask = self.masks[0] if self.masks[0] >> move & 1 else self.masks[1]
+        return completes_line(mask, move, self.lines_through)
+
+
 class Player:
     """
     An abstract player.
@@ -47,9 +235,11 @@ class Player:
     Attributes
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
-        - all_moves: :class:`list[int]` – all moves this player has made
         - has_first_turn: :class:`bool` – whether this player goes first
+        - remembers: :class:`int` – how many of the game's first moves its choices depend on, besides the position
     """
+    __slots__ = ('tile_type', 'name', 'has_first_turn')
+    remembers = 0
 
     @abstractmethod
     def __init__(self, tile_type: str, name: str):
@@ -59,20 +249,16 @@ class Player:
         """
         self.tile_type = tile_type
         self.name = name
-        self.all_moves = []
         self.has_first_turn = None
 
     @abstractmethod
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
-        """Returns a valid move."""
+    def move(self, board: Board) -> int:
+        """Returns a valid move. The player to move always owns board.masks[board.turn]."""
         pass
 
-    def check_winning_move(self, move: int) -> bool:
-        """Returns whether a move won the game."""
-        for line in lines:
-            if move in line and all(x in self.all_moves for x in line):
-                return True
-        return False
+    def reset(self):
+        """Forget the last game, ready to play another."""
+        self.has_first_turn = None
 
 
 class Human(Player):
@@ -83,15 +269,19 @@ class Human(Player):
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
     """
+    __slots__ = ()
 
     def __init__(self, tile_type, name):
         super().__init__(tile_type, name)
 
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
+    def move(self, board: Board) -> int:
+        """Returns which square the player wants to play their move on, or UNDO."""
         while True:
-            move = input("Choose an available square [0-8]")
-            if move.isdigit() and int(move) < 9:
+            move = input(f"Choose an available square [0-{board.size - 1}] or [U] to undo")
+            if move.isdigit() and int(move) < board.size:
                 return int(move)
+            elif move.lower() == 'u':
+                return UNDO
             else:
                 print("That's not a valid square")
 
@@ -104,12 +294,13 @@ class Random(Player):
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
     """
+    __slots__ = ()
 
     def __init__(self, tile_type, name):
         super().__init__(tile_type, name)
 
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
-        return random.choice(tuple(available))
+    def move(self, board: Board) -> int:
+        return random.choice(mask_squares(board.available))
 
 
 class RandomNotStupid(Player):
@@ -120,59 +311,70 @@ class RandomNotStupid(Player):
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
     """
+    __slots__ = ()
 
     def __init__(self, tile_type, name):
         super().__init__(tile_type, name)
 
-    def try_win_or_block(self, available: set, other_player_moves: list):
-        possible_moves = check_if_losing(available, self.all_moves)
-        if possible_moves is not False:  #check if there's any winning moves
-            return possible_moves
-        possible_moves = check_if_losing(available, other_player_moves)
-        if possible_moves is not False:  #check if it needs to block other player
+    def try_win_or_block(self, board: Board) -> int | None:
+        turn = board.turn
+        possible_moves = board.threat(turn)
+        if possible_moves is not None:  #check if there's any winning moves
             return possible_moves
+        return board.threat(turn ^ 1)  #check if it needs to block other player
 
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
-        win_block = self.try_win_or_block(available, other_player_moves)
+    def move(self, board: Board) -> int:
+        win_block = self.try_win_or_block(board)
         if win_block is not None:
             return win_block
-        return random.choice(tuple(available))
+        return random.choice(mask_squares(board.available))
 
 
 class Impossible(RandomNotStupid):
     """
-    An AI player that never loses.
+    An AI player that never loses. Only plays the classic 3x3 board.
     
     Attributes
         - tile_type: :class:`str` – which marker this player puts down
         - name: :class:`str` – the name of this player
         - case: :class:`str` – whether opponent put down a corner, edge, or middle on their first move
     """
+    __slots__ = ('case',)
+    remembers = 5
 
     def __init__(self, tile_type, name):
         super().__init__(tile_type, name)
         self.case = None
 
-    def goes_first_or_middle_case(self, available: set) -> int:
+    def reset(self):
+        super().reset()
+        self.case = None
+
+    def random_move(self, board: Board) -> int:
+        """Any available square, for when the case's plan has run out."""
+        return random.choice(squares[board.available])
+
+    def goes_first_or_middle_case(self, board: Board) -> int:
         """
         Move algorithm if AI goes first or if the other player's first move
         is the middle tile.
         """
-        if len(self.all_moves) == 0:
+        num_moves = len(board.moves) >> 1  #how many moves this player has made
+        if num_moves == 0:
             return random.choice(corners)
-        elif len(self.all_moves) == 1:
-            corner = get_corner(self.all_moves[0])
-            if corner in available:
+        elif num_moves == 1:
+            corner = get_corner(board.moves[board.turn])
+            if board.available >> corner & 1:
                 return corner
             else:
-                return random.choice(tuple(set(corners) & available))
-        elif len(self.all_moves) == 2:
-            corner = random.choice(tuple(set(corners) & available))
-            if corner is not None:
-                return corner
-        return random.choice(tuple(available))
-
-    def corner_case(self, available: set, other_player_moves: list) -> int:
+                return random.choice(squares[corner_mask & board.available])
+        elif num_moves == 2:
+            free_corners = squares[corner_mask & board.available]
+            if free_corners:
+                return random.choice(free_corners)
+        return self.random_move(board)
+
+    def corner_case(self, board: Board) -> int:
         """
         Move algorithm for if AI goes 2nd and other player picks a corner on first turn.
         Steps are:
@@ -181,26 +383,21 @@ class Impossible(RandomNotStupid):
             (so if they chose an edge on their second turn, don't pick the edge opposite to that)
         3. pick a corner beside their block
         """
-        if len(self.all_moves) == 0:
+        num_moves = len(board.moves) >> 1
+        if num_moves == 0:
             return 4
-        elif len(self.all_moves) == 1:
-            edges = {1, 3, 5, 7}
-            if other_player_moves[1] in edges:
-                opposite = get_opposite(other_player_moves[1])
-                edges.remove(opposite)
-            return random.choice(tuple(edges & available))
-        elif len(self.all_moves) == 2:
-            if other_player_moves[2] == 1 and len(tuple({0, 2} & available)) != 0:
-                return random.choice(tuple({0, 2} & available))
-            elif other_player_moves[2] == 3 and len(tuple({0, 6} & available)) != 0:
-                return random.choice(tuple({0, 6} & available))
-            elif other_player_moves[2] == 5 and len(tuple({2, 8} & available)) != 0:
-                return random.choice(tuple({2, 8} & available))
-            elif other_player_moves[2] == 7 and len(tuple({6, 8} & available)) != 0:
-                return random.choice(tuple({6, 8} & available))
-        return random.choice(tuple(available))
-
-    def edge_case(self, available: set, other_player_moves: list) -> int:
+        elif num_moves == 1:
+            edges = edge_mask
+            if edge_mask >> board.moves[2] & 1:
+                edges &= ~(1 << get_opposite(board.moves[2]))
+            return random.choice(squares[edges & board.available])
+        elif num_moves == 2:
+            beside_block = edge_corners.get(board.moves[4], 0) & board.available
+            if beside_block:
+                return random.choice(squares[beside_block])
+        return self.random_move(board)
+
+    def edge_case(self, board: Board) -> int:
         """
         Move algorithm for if AI goes 2nd and other player picks an edge on the first turn.
         Steps are:
@@ -209,119 +406,228 @@ class Impossible(RandomNotStupid):
         first move - to force them to block
         3. pick the middle
         """
-        if len(self.all_moves) == 0:
-            if other_player_moves[0] == 1:
-                return random.choice([0, 2])
-            elif other_player_moves[0] == 3:
-                return random.choice([0, 6])
-            elif other_player_moves[0] == 5:
-                return random.choice([2, 8])
-            else:
-                return random.choice([6, 8])
-        elif len(self.all_moves) == 1:
-            if 0 in self.all_moves:
-                if 1 not in other_player_moves and 2 in available:
+        num_moves = len(board.moves) >> 1
+        available = board.available
+        if num_moves == 0:
+            return random.choice(squares[edge_corners[board.moves[0]]])
+        elif num_moves == 1:
+            first = board.moves[1]
+            other_player_moves = board.masks[0]
+            if first == 0:
+                if not other_player_moves >> 1 & 1 and available >> 2 & 1:
                     return 2
-                elif 3 not in other_player_moves and 6 in available:
+                elif not other_player_moves >> 3 & 1 and available >> 6 & 1:
                     return 6
-            elif 2 in self.all_moves:
-                if 1 not in other_player_moves and 0 in available:
+            elif first == 2:
+                if not other_player_moves >> 1 & 1 and available >> 0 & 1:
                     return 0
-                elif 5 not in other_player_moves and 8 in available:
+                elif not other_player_moves >> 5 & 1 and available >> 8 & 1:
                     return 8
-            elif 6 in self.all_moves:
-                if 7 not in other_player_moves and 8 in available:
+            elif first == 6:
+                if not other_player_moves >> 7 & 1 and available >> 8 & 1:
                     return 8
-                elif 3 not in other_player_moves and 0 in available:
+                elif not other_player_moves >> 3 & 1 and available >> 0 & 1:
                     return 0
-            elif 8 in self.all_moves:
-                if 7 not in other_player_moves and 6 in available:
+            elif first == 8:
+                if not other_player_moves >> 7 & 1 and available >> 6 & 1:
                     return 6
-                elif 5 not in other_player_moves and 2 in available:
+                elif not other_player_moves >> 5 & 1 and available >> 2 & 1:
                     return 2
             return 4
-        elif len(self.all_moves) == 2:
-            if 4 in available:
+        elif num_moves == 2:
+            if available >> 4 & 1:
                 return 4
-        return random.choice(tuple(available))
+        return self.random_move(board)
 
-    def goes_second(self, available: set, other_player_moves: list) -> int:
+    def goes_second(self, board: Board) -> int:
         """
         Identify which algorithm to use depending on what the other player's
         first move was, and return a move based on that.
         """
         #first move - identify which case
-        if len(self.all_moves) == 0:
-            if other_player_moves[0] in corners:
+        if len(board.moves) == 1:
+            if corner_mask >> board.moves[0] & 1:
                 self.case = 'corner'
-            elif other_player_moves[0] in [1, 3, 5, 7]:
+            elif edge_mask >> board.moves[0] & 1:
                 self.case = 'edge'
             else:
                 self.case = 'middle'
         #go to algorithm for the case
         if self.case == 'corner':
-            return self.corner_case(available, other_player_moves)
+            return self.corner_case(board)
         elif self.case == 'edge':
-            return self.edge_case(available, other_player_moves)
+            return self.edge_case(board)
         else:
-            return self.goes_first_or_middle_case(available)
+            return self.goes_first_or_middle_case(board)
 
-    def move(self, has_first_turn: bool, available: set, other_player_moves: list) -> int:
+    def move(self, board: Board) -> int:
         """
         Return a valid move for Impossible AI.
         """
-        win_block = self.try_win_or_block(available, other_player_moves)
+        win_block = self.try_win_or_block(board)
         if win_block is not None:
             return win_block
-        if has_first_turn is True:
-            return self.goes_first_or_middle_case(available)
+        if self.has_first_turn is True:
+            return self.goes_first_or_middle_case(board)
         else:
-            return self.goes_second(available, other_player_moves)
+            return self.goes_second(board)
+
+
+# every reachable position, keyed by first | second << 9, mapped to
+# (value for the side to move: 1 win, 0 tie, -1 loss, tuple of optimal moves)
+perfect_play = {}
+
+
+def solve(first: int = 0, second: int = 0) -> int:
+    """
+    Fill perfect_play with this position and every position reachable from it.
+    Returns the game value for the side to move.
+
+    :param first: bitmask of the squares held by the player who went first
+    :param second: bitmask of the squares held by the player who went second
+    """
+    key = first | second << 9
+    entry = perfect_play.get(key)
+    if entry is not None:
+        return entry[0]
+    available = full_board ^ (first | second)
+    first_to_move = first.bit_count() == second.bit_count()
+    mine = first if first_to_move else second
+    best_value = -2
+    best_moves = []
+    for square in squares[available]:
+        bit = 1 << square
+        child_key = key | (bit if first_to_move else bit << 9)
+        if completes_line(mine | bit, square):
+            value = 1
+            perfect_play[child_key] = (-1, ())
+        elif available == bit:
+            value = 0
+            perfect_play[child_key] = (0, ())
+        elif first_to_move:
+            value = -solve(first | bit, second)
+        else:
+            value = -solve(first, second | bit)
+        if value > best_value:
+            best_value = value
+            best_moves = [square]
+        elif value == best_value:
+            best_moves.append(square)
+    perfect_play[key] = (best_value, tuple(best_moves))
+    return best_value
+
+
+class Perfect(Player):
+    """
+    An AI player that looks up an optimal move for every position in a
+    precomputed table of solved tic-tac-toe, built the first time one is created.
+    Only plays the classic 3x3 board.
+
+    Attributes
+        - tile_type: :class:`str` – which marker this player puts down
+        - name: :class:`str` – the name of this player
+    """
+    __slots__ = ()
+
+    def __init__(self, tile_type, name):
+        super().__init__(tile_type, name)
+        if not perfect_play:
+            solve()
+
+    def move(self, board: Board) -> int:
+        return random.choice(perfect_play[board.masks[0] | board.masks[1] << 9][1])
 
 
-def choose_type(tile_type: str, name: str) -> Player:
-    """Let the player choose multiplayer or the AI they want to play against."""
-    choice = input("2 player [H] or single player [options: Easy[E], Intermediate[M], or Impossible[I]]?").lower()
+def choose_type(tile_type: str, name: str, classic: bool = True) -> Player:
+    """
+    Let the player choose multiplayer or the AI they want to play against.
+    Impossible and Perfect are only offered on the classic 3x3 board.
+    """
+    if classic:
+        choice = input("2 player [H] or single player "
+                       "[options: Easy[E], Intermediate[M], Impossible[I], or Perfect[P]]?").lower()
+    else:
+        choice = input("2 player [H] or single player [options: Easy[E] or Intermediate[M]]?").lower()
     if choice == 'h':
         return Human(tile_type, name)
     elif choice == 'e':
         return Random(tile_type, name)
-    elif choice == 'm':
+    elif choice == 'm' or not classic:
         return RandomNotStupid(tile_type, name)
+    elif choice == 'p':
+        return Perfect(tile_type, name)
     else:
         return Impossible(tile_type, name)
 
 
-class Game(object):
+class Result(NamedTuple):
     """
-    A game of tic-tac-toe.
-    
+    How a game ended.
+
+    Attributes
+        - winner: :class:`Player | None` – the player who won, or None for a tie
+        - moves: :class:`tuple[int, ...]` – every move of the game, in order
+    """
+    winner: Player | None
+    moves: tuple[int, ...]
+
+
+class Match(object):
+    """
+    A game of tic-tac-toe between two players, with no input or output of its own.
+    Front-ends and simulations drive it with step() or play(), or move by move
+    with make_move() and unmake_move().
+
     Attributes
-        - board: :class:`list[str]` – a representation of the tic-tac-toe board
-        - available: :class:`list[int]` – a set of all available moves
+        - board: :class:`Board` – the current position
         - player1: :class:`Player` – a Player of the game
         - player2: :class:`Player` – another Player of the game
+        - players: :class:`tuple[Player, Player]` – both players in turn order
         - curr_player: :class:`Player` – the Player whose turn it is currently
+        - winner: :class:`Player | None` – the player who won, once there is one
+        - finished: :class:`bool` – whether the game is over
     """
+    __slots__ = ('board', 'player1', 'player2', 'players', 'curr_player', 'winner', 'finished')
 
-    def __init__(self):
-        self.board = [f"{i}" for i in range(9)]
-        self.available = {i for i in range(9)}
-        self.player1 = Human('X', 'Human')
-        self.player2 = choose_type('O', 'Player 2')
-        self.player1.has_first_turn = True if input("Do you want to go first? [T/F]").lower() == 't' else False
-        self.player2.has_first_turn = not self.player1.has_first_turn
-        self.curr_player = self.player1 if self.player1.has_first_turn is True else self.player2
+    def __init__(self, player1: Player, player2: Player, player1_first: bool = True,
+                 width: int = 3, height: int = 3, k: int = 3):
+        """
+        :param player1: a Player of the game
+        :param player2: another Player of the game
+        :param player1_first: whether player1 goes first
+        :param width: number of columns
+        :param height: number of rows
+        :param k: how many in a row wins
+        """
+        self.board = Board(width, height, k)
+        self.player1 = player1
+        self.player2 = player2
+        self.player1.has_first_turn = player1_first
+        self.player2.has_first_turn = not player1_first
+        self.curr_player = self.player1 if player1_first is True else self.player2
+        self.players = (self.curr_player, self.get_other_player())
+        self.winner = None
+        self.finished = False
+
+    def reset(self, player1_first: bool | None = None):
+        """
+        Set up a new game between the same players on the same board, reusing
+        every object from the last one.
 
-    def __str__(self):
-        s = ""
-        i = 0
-        for j in range(3):
-            s += self.board[i] + " | " + self.board[i + 1] + " | " + self.board[i + 2] + "\n"
-            if not j == 2:
-                s += "----------\n"
-            i += 3
-        return s
+        :param player1_first: whether player1 goes first, or None to keep the last game's order
+        """
+        if player1_first is None:
+            player1_first = self.players[0] is self.player1
+        self.board.reset()
+        self.player1.reset()
+        self.player2.reset()
+        self.player1.has_first_turn = player1_first
+        self.player2.has_first_turn = not player1_first
+        self.curr_player = self.player1 if player1_first is True else self.player2
+        if self.players[0] is not self.curr_player:
+            self.players = (self.curr_player, self.get_other_player())
+        self.winner = None
+        self.finished = False
 
     def get_other_player(self):
         """Return the player whose turn is next."""
@@ -329,56 +635,196 @@ class Game(object):
 
     def validate_move(self, move: int) -> bool:
         """Make a move if it's an available square."""
-        if move in self.available:
-            self.available.remove(move)
-            self.curr_player.all_moves.append(move)
-            return True
-        return False
-
-    def play_game(self):
-        """Plays a game of tic-tac-toe."""
-        print(self)
-        moves = 0
-        while moves < 9:
-            print(f"{self.curr_player.name}'s turn:")
-            move = self.curr_player.move(self.curr_player.has_first_turn, self.available,
-                                         self.get_other_player().all_moves)
-            self.board[move] = self.curr_player.tile_type
-            if self.validate_move(move) is False:
-                print('Try again, that\'s not an available move')
-                continue
-            print(self)
-            if self.curr_player.check_winning_move(move) is True:
-                print(f"{self.curr_player.name} won!!")
-                return 'win'
-            moves += 1
+        return self.board.place(move)
+
+    def make_move(self, move: int) -> bool:
+        """
+        Make a move for the current player if it's an available square, and return
+        whether it was. The current player only passes to the other player if the
+        game isn't over.
+        """
+        if self.validate_move(move) is False:
+            return False
+        if self.board.check_winning_move(move) is True:
+            self.winner = self.curr_player
+            self.finished = True
+        elif not self.board.available:
+            self.finished = True
+        else:
             self.curr_player = self.get_other_player()
-        if moves == 9:
-            print('It\'s a tie')
-            return 'tie'
+        return True
+
+    def unmake_move(self) -> int:
+        """
+        Take back the last move and return its square, making it the turn of the
+        player who made it again. The board's moves are the undo stack, so this
+        copies nothing.
+        """
+        move = self.board.unplace()
+        self.winner = None
+        self.finished = False
+        self.curr_player = self.players[self.board.turn]
+        return move
 
+    def undo(self, player: Player) -> list[int]:
+        """
+        Take back player's last move and every move since, so it's their turn again.
+        Returns the squares taken back, last first, or an empty list if player
+        hasn't moved yet.
+        """
+        if len(self.board.moves) <= self.players.index(player):
+            return []
+        undone = [self.unmake_move()]
+        while self.curr_player is not player:
+            undone.append(self.unmake_move())
+        return undone
+
+    def step(self) -> int | None:
+        """
+        Ask the current player for a move and make it. Returns the move, or None if
+        it wasn't an available square and nothing changed.
+        """
+        move = self.curr_player.move(self.board)
+        if self.make_move(move) is False:
+            return None
+        return move
+
+    def play(self) -> Result:
+        """Play the game to the end."""
+        while not self.finished:
+            self.step()
+        return self.result
+
+    def events(self) -> Iterator[Event]:
+        """Play the game to the end, yielding what happens as it happens. See TicTacToeEvents."""
+        yield GameStart(self)
+        while not self.finished:
+            player = self.curr_player
+            move = player.move(self.board)
+            if move == UNDO:
+                undone = self.undo(player)
+                yield Undone(self, player, undone) if undone else Rejected(self, player)
+            elif self.make_move(move):
+                yield Move(self, player, move)
+            else:
+                yield Rejected(self, player)
+        yield Win(self, self.winner) if self.winner is not None else Tie(self)
 
-def game_loop():
-    """Play tic-tac-toe in a loop until the player quits."""
-    play_again = True
+    @property
+    def result(self) -> Result:
+        #a copy, since the board's own list is reused by reset() and unmake_move()
+        return Result(self.winner, tuple(self.board.moves))
+
+
+def play_games(player1_type: type[Player] = Impossible, player2_type: type[Player] = Impossible,
+               player1_first: bool = True, games: int = 1000001,
+               writer: RecordWriter | None = None, width: int = 3, height: int = 3,
+               k: int = 3) -> tuple[int, int, int]:
+    """
+    Play a number of games between two types of players and return (ties, player1 wins, player2 wins).
+    Every game is also written to writer, if there is one. width, height and k set the board, 3x3 by default.
+    """
     num_ties = 0
     num_player1_wins = 0
     num_player2_wins = 0
-    while play_again is True:
-        g = Game()
-        g.play_game()
-        if g == 'tie':
+    #the same players and match for every game, reset in between
+    player1 = player1_type('X', player1_type.__name__)
+    player2 = player2_type('O', f"{player2_type.__name__}2")
+    match = Match(player1, player2, player1_first, width, height, k)
+    for game in range(games):
+        if game:
+            match.reset()
+        winner = match.play().winner
+        if writer is not None:
+            writer.write_match(match)
+        if winner is None:
             num_ties += 1
-        elif g.curr_player is g.player1:
+        elif winner is player1:
             num_player1_wins += 1
         else:
             num_player2_wins += 1
-        again = input("do you want to play again? [Y/N]")
-        if again.lower() != 'y':
-            print('Thanks for playing!')
-            
-            break
+    return num_ties, num_player1_wins, num_player2_wins
+
+
+class Game(Match):
+    """
+    A game of tic-tac-toe in the console, against another person or an AI.
+    
+    Attributes
+        - board: :class:`Board` – the current position
+        - player1: :class:`Player` – a Player of the game
+        - player2: :class:`Player` – another Player of the game
+        - players: :class:`tuple[Player, Player]` – both players in turn order
+        - curr_player: :class:`Player` – the Player whose turn it is currently
+    """
+
+    def __init__(self, width: int = 3, height: int = 3, k: int = 3):
+        """
+        :param width: number of columns
+        :param height: number of rows
+        :param k: how many in a row wins
+        """
+        player1 = Human('X', 'Human')
+        player2 = choose_type('O', 'Player 2', (width, height, k) == (3, 3, 3))
+        goes_first = True if input("Do you want to go first? [T/F]").lower() == 't' else False
+        super().__init__(player1, player2, goes_first, width, height, k)
+
+    def __str__(self):
+        return board_text(self)
+
+    def play_game(self, sinks: list[Sink] | None = None):
+        """
+        Plays a game of tic-tac-toe in the console.
+
+        :param sinks: anything else to hand the game's events to, like a StatsCounter
+        """
+        result = run(self.events(), [ConsoleRenderer()] + (sinks or []))
+        return 'win' if isinstance(result, Win) else 'tie'
+
+
+def game_loop(width: int = 3, height: int = 3, k: int = 3, record: str | None = None):
+    """
+    Play tic-tac-toe in a loop until the player quits.
+
+    :param record: a record file to append every finished game to, 3x3 boards only
+    """
+    play_again = True
+    stats = StatsCounter()
+    writer = RecordWriter(record) if record is not None else None
+    sinks = [stats] if writer is None else [stats, RecordSink(writer)]
+    try:
+        while play_again is True:
+            g = Game(width, height, k)
+            g.play_game(sinks)
+            again = input("do you want to play again? [Y/N]")
+            if again.lower() != 'y':
+                print('Thanks for playing!')
+                print(f"{g.player1.name} won {stats.player1_wins}, {g.player2.name} won {stats.player2_wins}, "
+                      f"ties: {stats.ties}")
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def board_options(parser: argparse.ArgumentParser | None = None) -> argparse.Namespace:
+    """
+    Read the board size, how many in a row wins and where to record games from the command line.
+
+    :param parser: a parser with a front-end's own options already added, or None
+    """
+    if parser is None:
+        parser = argparse.ArgumentParser(description="Play m,n,k tic-tac-toe, 3x3 with 3 in a row by default.")
+    parser.add_argument('--width', type=int, default=3, help='number of columns')
+    parser.add_argument('--height', type=int, default=3, help='number of rows')
+    parser.add_argument('-k', type=int, default=3, help='how many in a row wins')
+    parser.add_argument('--record', metavar='FILE', help='append every finished game to a record file (3x3 only)')
+    options = parser.parse_args()
+    if options.record is not None and (options.width, options.height, options.k) != (3, 3, 3):
+        parser.error("only 3x3 games can be recorded")
+    return options
 
 
 if __name__ == '__main__':
-    game_loop()
+    options = board_options()
+    game_loop(options.width, options.height, options.k, options.record)
@@ -0,0 +1,110 @@
+"""
+Play every pairing of a list of AIs in both seatings across all CPU cores and
+print the results in the same format as the stats in the README.
+
+    python TicTacToeTournament.py Random RandomNotStupid Impossible --games 1000001
+
+Players are class names from TicTacToeText, or 'module:Class' for any other
+Player subclass.
+"""
+import argparse
+import importlib
+import os
+import random
+from multiprocessing import Pool
+
+from TicTacToeText import Impossible, Perfect, Player, Random, RandomNotStupid, play_games
+
+# the numbers the README uses for each AI
+TIERS = {Random: '1', RandomNotStupid: '2', Impossible: '3', Perfect: '4'}
+
+
+def load_player(spec: str) -> type[Player]:
+    """Return the Player subclass named by spec, either 'Class' from TicTacToeText or 'module:Class'."""
+    module_name, _, class_name = spec.rpartition(':')
+    player_type = getattr(importlib.import_module(module_name or 'TicTacToeText'), class_name, None)
+    if not (isinstance(player_type, type) and issubclass(player_type, Player)):
+        raise ValueError(f"{spec} is not a Player subclass")
+    return player_type
+
+
+def label(player_type: type[Player]) -> str:
+    return TIERS.get(player_type, player_type.__name__)
+
+
+def play_shard(shard: tuple) -> tuple[int, tuple[int, int, int]]:
+    """Seed this worker's random generator and play one slice of a matchup."""
+    matchup, player1_type, player2_type, player1_first, games, seed = shard
+    random.seed(seed)
+    return matchup, play_games(player1_type, player2_type, player1_first, games)
+
+
+def matchups(players: list[type[Player]]) -> list[tuple[type[Player], type[Player], bool]]:
+    """Every player against itself going first, then every pair in both seatings."""
+    pairs = [(player, player, True) for player in players]
+    for i, player1 in enumerate(players):
+        for player2 in players[i + 1:]:
+            pairs.append((player1, player2, True))
+            pairs.append((player1, player2, False))
+    return pairs
+
+
+def tournament(players: list[type[Player]], games: int, workers: int | None = None,
+               seed: int | None = None) -> list[tuple[type[Player], type[Player], bool, tuple[int, int, int]]]:
+    """
+    Play every matchup, sharding the games of each one across a process pool.
+
+    :param players: the Player subclasses to play
+    :param games: how many games to play per matchup and seating
+    :param workers: number of processes, defaults to the CPU count
+    :param seed: seeds the per-shard random generators so a run can be repeated
+    :returns: (player1 type, player2 type, player1 goes first, (ties, player1 wins, player2 wins)) per matchup
+    """
+    workers = workers or os.cpu_count() or 1
+    seeder = random.Random(seed)
+    pairs = matchups(players)
+    shards = []
+    for i, (player1_type, player2_type, player1_first) in enumerate(pairs):
+        size, extra = divmod(games, workers)
+        for worker in range(workers):
+            shard_games = size + (worker < extra)
+            if shard_games:
+                shards.append((i, player1_type, player2_type, player1_first, shard_games, seeder.getrandbits(64)))
+
+    totals = [[0, 0, 0] for _ in pairs]
+    with Pool(workers) as pool:
+        for i, counts in pool.imap_unordered(play_shard, shards):
+            for j, count in enumerate(counts):
+                totals[i][j] += count
+    return [(player1_type, player2_type, player1_first, tuple(total))
+            for (player1_type, player2_type, player1_first), total in zip(pairs, totals)]
+
+
+def format_results(results: list, games: int) -> str:
+    """Format tournament results like the README's stats."""
+    groups = [[]]
+    for player1_type, player2_type, player1_first, (ties, player1_wins, player2_wins) in results:
+        name1 = label(player1_type)
+        if player1_type is player2_type:
+            heading = f"{name1} vs {name1}, Player1 goes first:"
+        else:
+            heading = f"{name1} vs {label(player2_type)}, {name1} goes {'first' if player1_first else 'second'}:"
+            if player1_first:
+                groups.append([])
+        groups[-1].append(f"{heading}\nties: {ties},\nPlayer1 wins: {player1_wins},\nPlayer2 wins: {player2_wins}")
+    blocks = "\n\n\n".join("\n\n".join(group) for group in groups)
+    return f"tic-tac-toe tests: {games} times each\n\n{blocks}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play every pairing of the given AIs in both seatings.")
+    parser.add_argument('players', nargs='+', type=load_player)
+    parser.add_argument('-n', '--games', type=int, default=1000001, help='games per matchup and seating')
+    parser.add_argument('-j', '--workers', type=int, help='number of processes, defaults to the CPU count')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    print(format_results(tournament(args.players, args.games, args.workers, args.seed), args.games))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Prove an AI never loses on the 3x3 board by playing out every game it can be
+in: every move the opponent could make, and every pick the AI's own
+random.choice calls could make, in both seatings.
+
+    python TicTacToeVerify.py Impossible
+
+prints the size of each search, or the first losing line it finds as a move
+sequence, and exits non-zero if there was one.
+"""
+import argparse
+import copy
+import math
+from fractions import Fraction
+import random
+import sys
+import time
+
+import TicTacToeText
+from TicTacToeText import Board, Impossible, Player, mask_squares
+from TicTacToeTournament import load_player
+
+
+class Choices:
+    """
+    Stands in for the random module while an AI moves, picking by a script of
+    indices instead of at random. Picks past the end of the script take the
+    first item, and the size of everything picked from is kept so the next
+    script can be worked out.
+
+    Attributes
+        - script: :class:`list[int]` – which index to pick at each call
+        - sizes: :class:`list[int]` – how many items each call picked from
+    """
+
+    def __init__(self, script: list[int]):
+        self.script = script
+        self.sizes = []
+
+    def choice(self, seq):
+        index = self.script[len(self.sizes)] if len(self.sizes) < len(self.script) else 0
+        self.sizes.append(len(seq))
+        return seq[index]
+
+
+def next_script(choices: Choices) -> list[int] | None:
+    """Return the script after the one just played, counting up from the last pick, or None after the last."""
+    script = choices.script + [0] * (len(choices.sizes) - len(choices.script))
+    for i in reversed(range(len(choices.sizes))):
+        if script[i] + 1 < choices.sizes[i]:
+            return script[:i] + [script[i] + 1]
+    return None
+
+
+def move_distribution(player: Player, board: Board) -> dict[int, tuple[Fraction, Player]]:
+    """
+    Return every move the AI could make here with the chance of it making it,
+    each with the AI as it is after making it.
+    """
+    moves = {}
+    script = []
+    while script is not None:
+        choices = Choices(script)
+        #a player that only goes by the position is the same whatever it chose, so it needn't be copied
+        after = copy.copy(player) if player.remembers else player
+        TicTacToeText.random = choices
+        try:
+            move = after.move(board)
+        finally:
+            TicTacToeText.random = random
+        chance = Fraction(1, math.prod(choices.sizes))
+        if move in moves:
+            moves[move] = (moves[move][0] + chance, moves[move][1])
+        else:
+            moves[move] = (chance, after)
+        script = next_script(choices)
+    return moves
+
+
+def position_key(moves: list[int], remembers: int) -> tuple:
+    """
+    Positions with the same stones down and the same first few moves get the
+    same key, so AIs that only remember that many moves play them the same way.
+    """
+    return tuple(sorted(moves[0::2])), tuple(sorted(moves[1::2])), tuple(moves[:remembers])
+
+
+class Verifier:
+    """
+    Plays out every game between an AI and every possible opponent.
+
+    Positions with the same position_key are only searched once, so the AI's
+    remembers has to be right.
+
+    Attributes
+        - player_type: :class:`type[Player]` – the AI being checked
+        - ai_first: :class:`bool` – whether the AI goes first
+        - positions: :class:`int` – positions searched
+        - ai_branches: :class:`int` – different moves the AI could make, over every position it moved in
+        - games: :class:`dict` – losing line from each position searched, or None if it can't lose from there
+    """
+
+    def __init__(self, player_type: type[Player] = Impossible, ai_first: bool = True):
+        self.player_type = player_type
+        self.ai_first = ai_first
+        self.positions = 0
+        self.ai_branches = 0
+        self.games = {}
+
+    def losing_line(self) -> list[int] | None:
+        """Return a sequence of moves the AI loses, or None if there isn't one."""
+        player = self.player_type('X' if self.ai_first else 'O', self.player_type.__name__)
+        player.has_first_turn = self.ai_first
+        return self.search(Board(), player)
+
+    def search(self, board: Board, player: Player) -> list[int] | None:
+        """Search from the position on board, placing and unplacing moves on it, and leave it as it was."""
+        moves = board.moves
+        key = position_key(moves, self.player_type.remembers)
+        if key in self.games:
+            return self.games[key]
+        self.positions += 1
+        ai_turn = board.turn == (0 if self.ai_first else 1)
+        line = None
+        if moves and board.check_winning_move(moves[-1]):
+            #the side that just moved won, which is a loss if that was the opponent
+            if ai_turn:
+                line = list(moves)
+        elif board.available:
+            if ai_turn:
+                options = {move: after for move, (_, after) in move_distribution(player, board).items()}
+                self.ai_branches += len(options)
+            else:
+                options = dict.fromkeys(mask_squares(board.available), player)
+            for move, after in options.items():
+                board.place(move)
+                line = self.search(board, after)
+                board.unplace()
+                if line is not None:
+                    break
+        self.games[key] = line
+        return line
+
+
+def verify(player_type: type[Player] = Impossible) -> bool:
+    """Check player_type in both seatings, printing what was searched. Returns True if it never loses."""
+    never_loses = True
+    for ai_first in (True, False):
+        start = time.perf_counter()
+        verifier = Verifier(player_type, ai_first)
+        line = verifier.losing_line()
+        elapsed = time.perf_counter() - start
+        seating = 'first' if ai_first else 'second'
+        print(f"{player_type.__name__} going {seating}: {verifier.positions} positions, "
+              f"{verifier.ai_branches} AI branches in {elapsed:.3f}s")
+        if line is not None:
+            never_loses = False
+            print(f"  loses to {' '.join(map(str, line))}")
+    return never_loses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that an AI never loses a 3x3 game, whatever the "
+                                                 "opponent and the AI's own random picks.")
+    parser.add_argument('player', nargs='?', default='Impossible', type=load_player,
+                        help="a Player class from TicTacToeText, or 'module:Class'")
+    args = parser.parse_args()
+    sys.exit(0 if verify(args.player) else 1)
+
+
+if __name__ == '__main__':
+    main()
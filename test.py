@@ -1,79 +1,54 @@
-from TicTacToeText import Human, Impossible, Player, Random, RandomNotStupid
+import random
+import sys
 
+from TicTacToeText import Board, Impossible, check_if_losing, mask_squares, play_games
+from TicTacToeVerify import verify
 
-class Game(object):
-    """
-    A game of tic-tac-toe.
-
-    Attributes:
-        board: a representation of the tic-tac-toe board
-        available: a set of all available moves
-        player1: a Player of the game
-        player2: another Player of the game
-        curr_player: the Player whose turn it is currently
-    """
 
-    def __init__(self):
-        self.board = [f"{i}" for i in range(9)]
-        self.available = {i for i in range(9)}
-        self.player1 = Impossible('X', 'Impossible')
-        self.player2 = Impossible('O', 'Impossible2')
-        self.player1.has_first_turn = True
-        self.player2.has_first_turn = not self.player1.has_first_turn
-        self.curr_player = self.player1 if self.player1.has_first_turn is True else self.player2
+def snapshot(board: Board) -> tuple:
+    return (list(board.masks), board.available, list(board.moves), [list(counts) for counts in board.counts],
+            [dict(threats) for threats in board.threats])
 
-    def get_other_player(self):
-        return self.player1 if self.curr_player is self.player2 else self.player2
 
-    def validate_move(self, move: int) -> bool:
-        """Make a move if it's an available square."""
-        if move in self.available:
-            self.available.remove(move)
-            self.curr_player.all_moves.append(move)
-            return True
-        return False
-
-    def play_game(self):
-        """Plays a game of tic-tac-toe."""
-        #print(self)
-        moves = 0
-        while moves < 9:
-            #print(f"{self.curr_player.name}'s turn:")
-            move = self.curr_player.move(self.curr_player.has_first_turn, self.available,
-                                         self.get_other_player().all_moves)
-            self.board[move] = self.curr_player.tile_type
-            if self.validate_move(move) is False:
-                print('Try again, that\'s not an available move')
-                continue
-            #print(self)
-            if self.curr_player.check_winning_move(move) is True:
-                #print(f"{self.curr_player.name} won!!")
-                return 'win'
-            moves += 1
-            self.curr_player = self.get_other_player()
-        if moves == 9:
-            #print('It\'s a tie')
-            return 'tie'
+def check_board(shapes: tuple = ((3, 3, 3), (4, 4, 3), (5, 5, 4), (6, 4, 3), (7, 6, 4), (3, 3, 2), (9, 1, 3)),
+                games: int = 200, seed: int = 0) -> bool:
+    """
+    Fill boards of each shape with random moves, checking after every move that
+    threat() finds the same square as check_if_losing for both sides, then take
+    every move back, checking that unplace() leaves the board exactly as it was
+    before that move. Prints the first mismatch and returns whether there were none.
+    """
+    rng = random.Random(seed)
+    for width, height, k in shapes:
+        board = Board(width, height, k)
+        for _ in range(games):
+            board.reset()
+            snapshots = []
+            while board.available:
+                snapshots.append(snapshot(board))
+                board.place(rng.choice(mask_squares(board.available)))
+                for side in (0, 1):
+                    expected = check_if_losing(board.available, board.masks[side], board.lines)
+                    if board.threat(side) != expected:
+                        print(f"{width}x{height} k={k} after {board.moves}: threat({side}) is "
+                              f"{board.threat(side)}, check_if_losing finds {expected}")
+                        return False
+            while snapshots:
+                board.unplace()
+                if snapshot(board) != snapshots.pop():
+                    print(f"{width}x{height} k={k}: unplace() back to {board.moves} didn't restore the board")
+                    return False
+    print(f"board bookkeeping matches on {len(shapes)} board shapes, {games} games each")
+    return True
 
 
 def game_loop():
-    play_again = 1000000
-    num_ties = 0
-    num_player1_wins = 0
-    num_player2_wins = 0
-    while play_again >= 0:
-        g = Game()
-        if g.play_game() == 'tie':
-            num_ties += 1
-        elif g.curr_player is g.player1:
-            num_player1_wins += 1
-        else:
-            num_player2_wins += 1
-        play_again -= 1
+    num_ties, num_player1_wins, num_player2_wins = play_games()
     print("ties: " + str(num_ties))
     print("Player1 wins: " + str(num_player1_wins))
     print("Player2 wins: " + str(num_player2_wins))
 
 
 if __name__ == '__main__':
-    game_loop()
+    #every game Impossible can play, instead of a million random ones, then the board's threats and undo
+    sys.exit(0 if verify(Impossible) and check_board() else 1)